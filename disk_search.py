@@ -0,0 +1,266 @@
+"""
+Breadth-first search whose frontier and seen configurations live on disk,
+for state spaces too large to hold in memory.
+
+Each layer of the search is a file of (configuration, parent) records,
+sorted by configuration.  Only the part of a configuration that changes
+is packed, by a puzzle_codec.StateCodec, into bytes of one fixed width;
+the starting puzzle, kept in memory, holds the rest.  The next layer is
+generated in sorted runs of bounded size, which are merged, stripped of
+duplicates, and stripped of configurations already in recent layers, all
+by streaming.  A solution is traced back through the parent records.
+"""
+from heapq import merge
+import os
+from tempfile import TemporaryDirectory
+from puzzle_codec import StateCodec
+from puzzle_tools import PuzzleNode, _path, _probes
+
+
+def _records(path, width):
+    """
+    Yield the (configuration, parent) records, each of width bytes, in the
+    file at path.
+
+    @type path: str
+    @type width: int
+    @rtype: Iterator[tuple[bytes, bytes]]
+    """
+    size = 2 * width
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(size * 4096)
+            if not block:
+                return
+            for i in range(0, len(block), size):
+                yield block[i:i + width], block[i + width:i + size]
+
+
+def _write(path, records):
+    """
+    Write records to the file at path, and return how many there were.
+
+    @type path: str
+    @type records: Iterable[tuple[bytes, bytes]]
+    @rtype: int
+    """
+    count = 0
+    with open(path, "wb") as f:
+        for state, parent in records:
+            f.write(state + parent)
+            count += 1
+    return count
+
+
+def _unique(records, stats):
+    """
+    Yield the first of each run of records, sorted by configuration, with
+    the same configuration.
+
+    @type records: Iterable[tuple[bytes, bytes]]
+    @type stats: SearchStats | None
+    @rtype: Iterator[tuple[bytes, bytes]]
+
+    >>> list(_unique([(b"a", b"1"), (b"a", b"2"), (b"b", b"1")], None))
+    [(b'a', b'1'), (b'b', b'1')]
+    """
+    last = None
+    for record in records:
+        if record[0] == last:
+            if stats is not None:
+                stats.duplicates += 1
+        else:
+            last = record[0]
+            yield record
+
+
+def _subtract(records, layers, stats):
+    """
+    Yield the records, sorted by configuration, whose configuration is in
+    none of layers, each a sorted stream of records.
+
+    @type records: Iterable[tuple[bytes, bytes]]
+    @type layers: list[Iterator[tuple[bytes, bytes]]]
+    @type stats: SearchStats | None
+    @rtype: Iterator[tuple[bytes, bytes]]
+
+    >>> list(_subtract([(b"a", b""), (b"b", b""), (b"c", b"")],
+    ...                [iter([(b"b", b"")]), iter([(b"a", b""), (b"d", b"")])],
+    ...                None))
+    [(b'c', b'')]
+    """
+    heads = [next(layer, None) for layer in layers]
+    for record in records:
+        seen = False
+        for i, layer in enumerate(layers):
+            while heads[i] is not None and heads[i][0] < record[0]:
+                heads[i] = next(layer, None)
+            seen = seen or (heads[i] is not None and heads[i][0] == record[0])
+        if not seen:
+            yield record
+        elif stats is not None:
+            stats.duplicates += 1
+
+
+def _parent(path, state, width):
+    """
+    Return the parent recorded for configuration state in the layer file
+    at path, found by binary search over its sorted records.
+
+    @type path: str
+    @type state: bytes
+    @type width: int
+    @rtype: bytes
+    """
+    size = 2 * width
+    with open(path, "rb") as f:
+        low, high = 0, os.path.getsize(path) // size
+        while low < high:
+            middle = (low + high) // 2
+            f.seek(middle * size)
+            record = f.read(size)
+            if record[:width] < state:
+                low = middle + 1
+            elif record[:width] > state:
+                high = middle
+            else:
+                return record[width:]
+    raise ValueError("no record of a configuration in {}".format(path))
+
+
+def disk_breadth_first_solve(puzzle, directory=None, run_bytes=2 ** 26,
+                             history=2, stats=None, moves=False):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, as breadth_first_solve does, keeping the search
+    in files under directory (by default, the system's temporary
+    directory) and at most about run_bytes of new configurations in memory.
+    Return None if this is not possible.
+
+    A configuration is looked for only in the history layers before its
+    own, or in all of them if history is None.  Two are enough when every
+    move can be undone, as in MNPuzzle and WordLadderPuzzle, or when no
+    configuration can recur, as in GridPegSolitairePuzzle and SudokuPuzzle.
+
+    If stats is given, record the progress of the search in it.  If moves
+    is True, return the path as a MoveList.
+
+    @type puzzle: Puzzle
+    @type directory: str | None
+    @type run_bytes: int
+    @type history: int | None
+    @type stats: SearchStats | None
+    @type moves: bool
+    @rtype: PuzzleNode | MoveList | None
+
+    >>> from mn_puzzle import MNPuzzle
+    >>> from puzzle_tools import SearchStats, breadth_first_solve
+    >>> m = MNPuzzle((("*", "2", "3"), ("1", "4", "5")),
+    ...              (("1", "2", "3"), ("4", "5", "*")))
+    >>> path = disk_breadth_first_solve(m, run_bytes=1024, moves=True)
+    >>> path == breadth_first_solve(m, moves=True)
+    True
+    >>> stats = SearchStats()
+    >>> stuck = MNPuzzle((("2", "1", "3"), ("4", "5", "*")),
+    ...                  (("1", "2", "3"), ("4", "5", "*")))
+    >>> disk_breadth_first_solve(stuck, run_bytes=1024, stats=stats) is None
+    True
+    >>> stats.expanded
+    360
+    """
+    codec = StateCodec(puzzle)
+    key, solved, failed, extend = _probes(stats, codec.encode)
+    width = codec.width
+    with TemporaryDirectory(dir=directory) as work:
+        layers = [os.path.join(work, "layer0")]
+        # the starting configuration is its own parent
+        _write(layers[0], [(key(puzzle), key(puzzle))])
+        depth = 0
+        while True:
+            runs, run, size, generated = [], [], 0, 0
+            for state, _ in _records(layers[depth], width):
+                p = codec.decode(state)
+                if solved(p):
+                    return _path(_trace(layers, state, codec), moves)
+                elif failed(p):
+                    if stats is not None:
+                        stats.pruned += 1
+                    continue
+                extensions = extend(p)
+                for e in extensions:
+                    child = key(e)
+                    run.append((child, state))
+                    size += 2 * width
+                generated += len(extensions)
+                if stats is not None:
+                    stats.record_expansion(depth, generated, len(extensions))
+                if size >= run_bytes:
+                    runs.append(_sorted_run(work, len(runs), run))
+                    run, size = [], 0
+            if run:
+                runs.append(_sorted_run(work, len(runs), run))
+
+            earlier = layers if history is None else layers[-history:]
+            layers.append(os.path.join(work, "layer{}".format(depth + 1)))
+            count = _write(layers[-1], _subtract(
+                _unique(merge(*[_records(r, width) for r in runs]), stats),
+                [_records(layer, width) for layer in earlier], stats))
+            for r in runs:
+                os.remove(r)
+            if count == 0:
+                return None
+            depth += 1
+
+
+def _sorted_run(directory, number, run):
+    """
+    Write the records of run, sorted, to a new file in directory, and
+    return its path.
+
+    @type directory: str
+    @type number: int
+    @type run: list[tuple[bytes, bytes]]
+    @rtype: str
+    """
+    path = os.path.join(directory, "run{}".format(number))
+    run.sort()
+    _write(path, run)
+    return path
+
+
+def _trace(layers, state, codec):
+    """
+    Return the end of the path of PuzzleNodes from the configuration in
+    the first of layers to configuration state in the last layer searched,
+    following parent records back and decoding them with codec.
+
+    @type layers: list[str]
+    @type state: bytes
+    @type codec: StateCodec
+    @rtype: PuzzleNode
+    """
+    states = [state]
+    for layer in reversed(layers[1:]):
+        states.append(_parent(layer, states[-1], codec.width))
+    p_node = None
+    for s in reversed(states):
+        p_node = PuzzleNode(codec.decode(s), parent=p_node)
+    return p_node
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
+    from mn_puzzle import MNPuzzle
+    from puzzle_tools import SearchStats
+    from time import time
+
+    stuck = MNPuzzle((("2", "1", "3"), ("4", "5", "6"), ("7", "8", "*")),
+                     (("1", "2", "3"), ("4", "5", "6"), ("7", "8", "*")))
+    stats = SearchStats()
+    start = time()
+    print("Solvable: {}".format(
+        disk_breadth_first_solve(stuck, stats=stats) is not None))
+    print("Searched {} configurations of the 3x3 puzzle in {:.0f} seconds"
+          .format(stats.expanded, time() - start))
@@ -0,0 +1,218 @@
+"""
+Breadth-first search for word ladders that expands each whole layer of the
+search at once, split across worker processes.
+
+The workers get the word set (and, for ladders in "edit" mode, its
+word_list.NeighborIndex) when they start; where processes are forked they
+share the parent's copy instead of receiving one.  Each layer is sent out
+as chunks of words, and the neighbours that come back are merged into the
+next layer in the parent.
+"""
+from multiprocessing import Pool, cpu_count
+from puzzle_tools import PuzzleNode, _path
+from word_ladder_puzzle import WordLadderPuzzle
+import word_list
+
+# the word set and mode of the ladders a worker process expands
+_shared = {}
+
+
+def _share(ws, mode):
+    """
+    Make word set ws and mode the ones the ladders of this worker process
+    use.
+
+    @type ws: set[str]
+    @type mode: str
+    @rtype: None
+    """
+    _shared["ws"], _shared["mode"] = ws, mode
+    if mode == "edit":
+        word_list.neighbor_index(ws)
+
+
+def _neighbours(to_word, words, ws, mode):
+    """
+    Return the words each of words steps to in a ladder to to_word over
+    word set ws in mode.
+
+    @type to_word: str
+    @type words: list[str]
+    @type ws: set[str]
+    @type mode: str
+    @rtype: list[list[str]]
+
+    >>> ws = {"cat", "cot", "dot"}
+    >>> _neighbours("dot", ["cat", "dot"], ws, "substitute")
+    [['cot'], ['cot']]
+    """
+    return [[e.key() for e in WordLadderPuzzle(w, to_word, ws,
+                                                mode).extensions()]
+            for w in words]
+
+
+def _expand(job):
+    """
+    Return the words each word of job[1] steps to on the way to job[0], in
+    a worker process.
+
+    @type job: tuple[str, list[str]]
+    @rtype: list[list[str]]
+    """
+    return _neighbours(job[0], job[1], _shared["ws"], _shared["mode"])
+
+
+class LadderPool:
+    """
+    Worker processes for solving word ladders over one word set.
+    """
+
+    def __init__(self, ws=None, mode="substitute", processes=None):
+        """
+        Create a new LadderPool self of processes workers (one per core by
+        default, none if processes is 1) for ladders over word set ws (the
+        words of words.txt if None) in mode.
+
+        @type self: LadderPool
+        @type ws: set[str] | None
+        @type mode: str
+        @type processes: int | None
+        @rtype: None
+        """
+        self._word_set = (word_list.words() if ws is None else
+                          frozenset(ws))
+        self._mode = mode
+        self._processes = cpu_count() if processes is None else processes
+        if mode == "edit":
+            # built before the workers start, so forked ones inherit it
+            word_list.neighbor_index(self._word_set)
+        self._pool = None
+        if self._processes > 1:
+            self._pool = Pool(self._processes, _share,
+                              (self._word_set, mode))
+
+    def close(self):
+        """
+        Stop the workers of LadderPool self.
+
+        @type self: LadderPool
+        @rtype: None
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        """
+        Return LadderPool self, for use in a with statement.
+
+        @type self: LadderPool
+        @rtype: LadderPool
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Close LadderPool self at the end of a with statement.
+
+        @type self: LadderPool
+        @rtype: None
+        """
+        self.close()
+
+    def solve(self, from_word, to_word, stats=None, moves=False):
+        """
+        Return a shortest path from PuzzleNode of the ladder from from_word
+        to to_word to a PuzzleNode containing a solution, as
+        breadth_first_solve does, or None if there is none.
+
+        If stats is given, record the progress of the search in it.  If
+        moves is True, return the path as a MoveList.
+
+        @type self: LadderPool
+        @type from_word: str
+        @type to_word: str
+        @type stats: SearchStats | None
+        @type moves: bool
+        @rtype: PuzzleNode | MoveList | None
+
+        >>> ws = {"cat", "cot", "cog", "dog", "hat"}
+        >>> with LadderPool(ws, processes=1) as pool:
+        ...     pool.solve("cat", "dog", moves=True).moves
+        ['cot', 'cog', 'dog']
+        >>> with LadderPool(ws, processes=1) as pool:
+        ...     pool.solve("cat", "pig") is None
+        True
+        """
+        parents, layer, depth = {from_word: None}, [from_word], 0
+        while layer and to_word not in parents:
+            # as many chunks as keep every worker busy without sending each
+            # word on its own
+            size = max(1, len(layer) // (4 * self._processes))
+            chunks = [(to_word, layer[i:i + size])
+                      for i in range(0, len(layer), size)]
+            if self._pool is None:
+                expanded = [_neighbours(to_word, words, self._word_set,
+                                        self._mode) for _, words in chunks]
+            else:
+                expanded = self._pool.map(_expand, chunks)
+            following = []
+            for (_, words), neighbours in zip(chunks, expanded):
+                for word, steps in zip(words, neighbours):
+                    if stats is not None:
+                        stats.record_expansion(depth, len(layer), len(steps))
+                    for step in steps:
+                        if step in parents:
+                            if stats is not None:
+                                stats.duplicates += 1
+                        else:
+                            parents[step] = word
+                            following.append(step)
+            layer, depth = following, depth + 1
+        if to_word not in parents:
+            return None
+        words = [to_word]
+        while parents[words[-1]] is not None:
+            words.append(parents[words[-1]])
+        p_node = None
+        for word in reversed(words):
+            p_node = PuzzleNode(WordLadderPuzzle(word, to_word,
+                                                 self._word_set, self._mode),
+                                parent=p_node)
+        return _path(p_node, moves)
+
+
+def parallel_breadth_first_solve(puzzle, processes=None, stats=None,
+                                 moves=False):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution of WordLadderPuzzle puzzle, as
+    breadth_first_solve does, expanding each layer on processes workers.
+
+    @type puzzle: WordLadderPuzzle
+    @type processes: int | None
+    @type stats: SearchStats | None
+    @type moves: bool
+    @rtype: PuzzleNode | MoveList | None
+
+    >>> w = WordLadderPuzzle("cat", "dog", {"cat", "cot", "cog", "dog"})
+    >>> parallel_breadth_first_solve(w, processes=1, moves=True).moves
+    ['cot', 'cog', 'dog']
+    """
+    with LadderPool(puzzle._word_set, puzzle._mode, processes) as pool:
+        return pool.solve(puzzle._from_word, puzzle._to_word, stats, moves)
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
+    from time import time
+
+    for processes in (1, cpu_count()):
+        start = time()
+        with LadderPool(processes=processes) as pool:
+            sol = pool.solve("same", "cost", moves=True)
+        print("same->cost with {} processes: {} in {:.2f} seconds".format(
+            processes, sol, time() - start))
@@ -1,6 +1,20 @@
 from puzzle import Puzzle
 
 
+def _rows(grid):
+    """
+    Return grid with its rows as tuples, so that grids given with rows as
+    lists or as tuples compare equal and can be hashed.
+
+    @type grid: tuple[tuple[str]] | tuple[list[str]]
+    @rtype: tuple[tuple[str]]
+
+    >>> _rows((['*', '1'], ('2', '3')))
+    (('*', '1'), ('2', '3'))
+    """
+    return tuple([tuple(row) for row in grid])
+
+
 class MNPuzzle(Puzzle):
     """
     An nxm puzzle, like 15-puzzle, which may be solved, unsolved, or unsolvable.
@@ -22,6 +36,30 @@ class MNPuzzle(Puzzle):
         assert all([len(r) == len(to_grid[0]) for r in to_grid])
         self.n, self.m = len(from_grid), len(from_grid[0])
         self.from_grid, self.to_grid = from_grid, to_grid
+        # rows may be lists; tuple() of a tuple row costs nothing
+        self._key = _rows(from_grid)
+        self._hash = hash(self._key)
+        # the goal, and the place of each of its tiles for heuristic, are
+        # worked out once here and shared by extensions through _with
+        self._goal = _rows(to_grid)
+        self._places = dict([(tile, (i, j))
+                             for i, row in enumerate(self._goal)
+                             for j, tile in enumerate(row)])
+
+    def _with(self, from_grid):
+        """
+        Return a copy of MNPuzzle self in configuration from_grid instead,
+        sharing self's goal.
+
+        @type self: MNPuzzle
+        @type from_grid: tuple[tuple[str]] | tuple[list[str]]
+        @rtype: MNPuzzle
+        """
+        other = object.__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        other.from_grid, other._key = from_grid, _rows(from_grid)
+        other._hash = hash(other._key)
+        return other
 
     def __eq__(self, other):
         """
@@ -41,10 +79,15 @@ class MNPuzzle(Puzzle):
         >>> mn2 = MNPuzzle(tuple(grid1), (tuple(grid2)))
         >>> mn1 == mn2
         True
+        >>> hash(mn1) == hash(mn2)
+        True
         """
-        return (type(self) == type(other) and
-                self.from_grid == other.from_grid and
-                self.to_grid == other.to_grid)
+        return self is other or (
+            type(self) == type(other) and self._hash == other._hash and
+            self._key == other._key and
+            (self._goal is other._goal or self._goal == other._goal))
+
+    __hash__ = Puzzle.__hash__
 
     # noinspection PyGlobalUndefined
     def __str__(self):
@@ -118,7 +161,53 @@ class MNPuzzle(Puzzle):
         >>> mn2.is_solved()
         False
         """
-        return self.from_grid == self.to_grid
+        return self._key == self._goal
+
+    def heuristic(self):
+        """
+        Return the sum over the tiles of MNPuzzle self of how many rows and
+        columns each is away from its place in to_grid, a lower bound on the
+        moves left.
+
+        @type self: MNPuzzle
+        @rtype: int
+
+        >>> grid1 = (('*', '2', '3'), ('1', '4', '5'))
+        >>> grid2 = (('1', '2', '3'), ('4', '5', '*'))
+        >>> MNPuzzle(grid1, grid2).heuristic()
+        3
+        >>> MNPuzzle(grid1, (['1', '2', '3'], ['4', '5', '*'])).heuristic()
+        3
+        """
+        places = self._places
+        distance = 0
+        for i, row in enumerate(self.from_grid):
+            for j, tile in enumerate(row):
+                if tile != '*' and tile in places:
+                    x, y = places[tile]
+                    distance += abs(x - i) + abs(y - j)
+        return distance
+
+    def key(self):
+        """
+        Return the current configuration of MNPuzzle self, with its rows
+        as tuples so that it can be hashed.
+
+        @type self: MNPuzzle
+        @rtype: tuple[tuple[str]]
+
+        >>> grid1 = (('*', '2'), ('1', '3'))
+        >>> MNPuzzle(grid1, grid1).key()
+        (('*', '2'), ('1', '3'))
+        >>> MNPuzzle((['*', '2'], ['1', '3']), grid1).key()
+        (('*', '2'), ('1', '3'))
+        >>> from puzzle_tools import breadth_first_solve
+        >>> p = MNPuzzle((['*', '1', '2'], ['3', '4', '5']),
+        ...              (['1', '2', '*'], ['3', '4', '5']))
+        >>> breadth_first_solve(p, moves=True).moves
+        ['right', 'right']
+        """
+        return self._key
 
     def extensions(self):
         """
@@ -152,9 +241,51 @@ class MNPuzzle(Puzzle):
             legal_extension = self._swap(i)
             if legal_extension:
                 # returning a list of tuples of list as the new extension
-                ext_list.append(MNPuzzle(legal_extension, self.to_grid))
+                ext_list.append(self._with(legal_extension))
         return ext_list
 
+    def move_to(self, other):
+        """
+        Return the direction the empty space moves in to take MNPuzzle self
+        to its extension other.
+
+        @type self: MNPuzzle
+        @type other: MNPuzzle
+        @rtype: str
+
+        >>> grid1 = (('*', '1', '2'), ('3', '4', '5'))
+        >>> grid2 = (('1', '2', '3'), ('4', '5', '*'))
+        >>> mn = MNPuzzle(grid1, grid2)
+        >>> [mn.move_to(e) for e in mn.extensions()]
+        ['down', 'right']
+        """
+        x, y = self._empty_tile()
+        i, j = other._empty_tile()
+        return ('up' if i < x else 'down' if i > x else
+                'left' if j < y else 'right')
+
+    def apply_move(self, move):
+        """
+        Return the extension of MNPuzzle self where the empty space moves in
+        direction move.
+
+        @type self: MNPuzzle
+        @type move: str
+        @rtype: MNPuzzle
+
+        >>> grid1 = (('*', '1', '2'), ('3', '4', '5'))
+        >>> grid2 = (('1', '2', '3'), ('4', '5', '*'))
+        >>> print(MNPuzzle(grid1, grid2).apply_move('right'))
+        ---------
+         1  *  2
+         3  4  5
+        ---------
+        """
+        from_grid = self._swap(move)
+        if from_grid is None:
+            raise ValueError('illegal move {}'.format(move))
+        return self._with(from_grid)
+
     def _empty_tile(self):
         counter = 0
         # looping over from grid tuple and lists in from grid to check for empty
@@ -0,0 +1,498 @@
+"""
+Peg solitaire on any board: a graph of holes and the jumps between them.
+
+A PegBoard lists its holes, each named by coordinates, and every jump a
+peg can make as the holes it jumps from, over and to, all worked out once
+when the board is made.  A PegSolitairePuzzle is a board together with
+the set of holes holding pegs, kept as a bitset (bit k for hole k), so a
+move is a few bitwise operations on an int.
+"""
+from puzzle import Puzzle
+
+# steps between neighbouring holes on boards of rows and columns, in the
+# order jumps are tried
+ORTHOGONAL = [("up", (-1, 0)), ("down", (1, 0)), ("left", (0, -1)),
+              ("right", (0, 1))]
+DIAGONAL = ORTHOGONAL + [("up-left", (-1, -1)), ("up-right", (-1, 1)),
+                         ("down-left", (1, -1)), ("down-right", (1, 1))]
+
+# steps between neighbouring holes of a triangular board, where hole
+# (r, c) is the c-th hole of row r and row r has r + 1 holes
+TRIANGULAR = [("up-left", (-1, -1)), ("up-right", (-1, 0)),
+              ("left", (0, -1)), ("right", (0, 1)),
+              ("down-left", (1, 0)), ("down-right", (1, 1))]
+
+
+class PegBoard:
+    """
+    The holes of a peg solitaire board and the jumps between them.
+
+    holes - the coordinates of the holes, in order of their bits
+    jumps - (from, over, to) hole numbers of each jump, ordered by the hole
+            jumped from and then by step
+    moves - the move (hole jumped from, name of step) of each jump
+    """
+
+    def __init__(self, holes, steps, stagger=False):
+        """
+        Create a new PegBoard self of holes, where a peg may jump from hole
+        h over hole h + s to hole h + 2s for each (name, s) in steps.  If
+        stagger is True, rows are drawn indented so that each hole sits
+        between the two below it.
+
+        @type self: PegBoard
+        @type holes: list[tuple[int, int]]
+        @type steps: list[tuple[str, tuple[int, int]]]
+        @type stagger: bool
+        @rtype: None
+
+        >>> board = PegBoard([(0, 0), (0, 1), (0, 2)], ORTHOGONAL)
+        >>> board.jumps, board.moves
+        ([(0, 1, 2), (2, 1, 0)], [((0, 0), 'right'), ((0, 2), 'left')])
+        """
+        self.holes, self._steps, self._stagger = (list(holes), list(steps),
+                                                  stagger)
+        # number of each hole, by its coordinates
+        self._numbers = number = dict([(h, k)
+                                       for k, h in enumerate(self.holes)])
+        self.jumps, self.moves = [], []
+        # holes one step from each hole, as a bitset
+        self._neighbours = [0] * len(self.holes)
+        for k, (i, j) in enumerate(self.holes):
+            for name, (di, dj) in steps:
+                over, to = (i + di, j + dj), (i + 2 * di, j + 2 * dj)
+                if over in number:
+                    self._neighbours[k] |= 1 << number[over]
+                    if to in number:
+                        self.jumps.append((k, number[over], number[to]))
+                        self.moves.append(((i, j), name))
+        self._move_numbers = dict([(m, n) for n, m in enumerate(self.moves)])
+        # for each jump, the bits that must hold pegs, the bit that must
+        # be empty, and the bits a jump flips
+        self._masks = [(1 << a | 1 << b, 1 << c, 1 << a | 1 << b | 1 << c)
+                       for a, b, c in self.jumps]
+        self._by_change = {}
+        for n, (_, _, change) in enumerate(self._masks):
+            self._by_change.setdefault(change, []).append(n)
+        # how far each hole is from the centre of the holes, in rows plus
+        # columns
+        count = max(len(self.holes), 1)
+        middle_i = sum([i for i, _ in self.holes]) / count
+        middle_j = sum([j for _, j in self.holes]) / count
+        self._centre_distances = [abs(i - middle_i) + abs(j - middle_j)
+                                  for i, j in self.holes]
+
+    @staticmethod
+    def grid(shape, diagonal=False):
+        """
+        Return the board with a hole at each position of the rows of shape
+        that is not "#", where pegs jump along rows and columns, and also
+        along diagonals if diagonal is True.
+
+        @type shape: list[str] | list[list[str]]
+        @type diagonal: bool
+        @rtype: PegBoard
+
+        >>> len(PegBoard.grid(["...", "...", "..."]).jumps)
+        12
+        >>> len(PegBoard.grid(["...", "...", "..."], diagonal=True).jumps)
+        16
+        """
+        return PegBoard([(i, j) for i in range(len(shape))
+                         for j in range(len(shape[i])) if shape[i][j] != "#"],
+                        DIAGONAL if diagonal else ORTHOGONAL)
+
+    @staticmethod
+    def triangle(size):
+        """
+        Return the triangular board with size rows of holes.
+
+        @type size: int
+        @rtype: PegBoard
+
+        >>> board = PegBoard.triangle(5)
+        >>> len(board.holes), len(board.jumps)
+        (15, 36)
+        """
+        return PegBoard([(r, c) for r in range(size) for c in range(r + 1)],
+                        TRIANGULAR, stagger=True)
+
+    def __eq__(self, other):
+        """
+        Return whether PegBoard self has the same holes and jumps as other.
+
+        @type self: PegBoard
+        @type other: PegBoard | Any
+        @rtype: bool
+
+        >>> PegBoard.grid(["..."]) == PegBoard.grid(["..."])
+        True
+        >>> PegBoard.grid(["..."]) == PegBoard.grid(["...", "#.."])
+        False
+        """
+        return self is other or (type(self) == type(other) and
+                                 self.holes == other.holes and
+                                 self.jumps == other.jumps)
+
+    def draw(self, pegs):
+        """
+        Return a picture of PegBoard self with pegs ("*") in the holes of
+        bitset pegs and the other holes empty ("."); positions that are not
+        holes are drawn "#" unless the board is staggered.
+
+        @type self: PegBoard
+        @type pegs: int
+        @rtype: str
+
+        >>> print(PegBoard.triangle(3).draw(0b111110))
+            .
+          *   *
+        *   *   *
+        """
+        marks = dict([(h, "*" if pegs >> k & 1 else ".")
+                      for k, h in enumerate(self.holes)])
+        rows = sorted(set([i for i, _ in self.holes]))
+        lines = []
+        if self._stagger:
+            for i in rows:
+                cells = sorted([j for r, j in self.holes if r == i])
+                lines.append("  " * (rows[-1] - i) + "   ".join(
+                    [marks[(i, j)] for j in cells]))
+        else:
+            columns = range(min([j for _, j in self.holes]),
+                            max([j for _, j in self.holes]) + 1)
+            for i in range(rows[0], rows[-1] + 1):
+                lines.append("".join([" {} ".format(marks.get((i, j), "#"))
+                                      for j in columns]).rstrip())
+        return "\n".join(lines)
+
+
+class PegSolitairePuzzle(Puzzle):
+    """
+    Peg solitaire on a PegBoard: jump a peg over a neighbouring peg into an
+    empty hole, removing the peg jumped over, until one peg is left.
+    """
+
+    def __init__(self, board, pegs):
+        """
+        Create a new PegSolitairePuzzle self on PegBoard board with pegs in
+        the holes at the coordinates in pegs.
+
+        @type self: PegSolitairePuzzle
+        @type board: PegBoard
+        @type pegs: Iterable[tuple[int, int]]
+        @rtype: None
+
+        >>> board = PegBoard.triangle(5)
+        >>> p = PegSolitairePuzzle(board, board.holes[1:])
+        >>> p.heuristic()
+        13
+        """
+        self._board = board
+        self._pegs = sum([1 << board._numbers[h] for h in set(pegs)])
+        self._hash = hash(self._pegs)
+
+    def _with(self, pegs):
+        """
+        Return a copy of PegSolitairePuzzle self with pegs in the holes of
+        bitset pegs instead.
+
+        @type self: PegSolitairePuzzle
+        @type pegs: int
+        @rtype: PegSolitairePuzzle
+        """
+        other = object.__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        other._pegs, other._hash = pegs, hash(pegs)
+        return other
+
+    def __eq__(self, other):
+        """
+        Return whether PegSolitairePuzzle self is equivalent to other.
+
+        @type self: PegSolitairePuzzle
+        @type other: PegSolitairePuzzle | Any
+        @rtype: bool
+
+        >>> board = PegBoard.triangle(3)
+        >>> p = PegSolitairePuzzle(board, [(1, 0), (2, 0)])
+        >>> p == PegSolitairePuzzle(board, [(2, 0), (1, 0)])
+        True
+        >>> p == PegSolitairePuzzle(board, [(1, 0)])
+        False
+        >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+        >>> grid1 = list()
+        >>> grid1.append([".", ".", "*", "*", "*", ".", "."])
+        >>> grid1.append([".", ".", "*", "*", "*", ".", "."])
+        >>> grid1.append(["*", "*", "*", "*", "*", "*", "*"])
+        >>> grid1.append(["*", "*", "*", "#", "*", "*", "*"])
+        >>> grid1.append(["*", "*", "*", "*", "*", "*", "*"])
+        >>> grid1.append([".", ".", "*", "*", "*", ".", "."])
+        >>> grid1.append([".", ".", "*", "*", "*", ".", "."])
+        >>> gps1 = GridPegSolitairePuzzle(grid1, {"*", ".", "#"})
+        >>> grid2 = list()
+        >>> grid2.append([".", ".", "*", "*", "*", ".", "."])
+        >>> grid2.append(["*", ".", "*", "*", "*", ".", "."])
+        >>> grid2.append([".", "*", "*", "*", "*", "*", "*"])
+        >>> grid2.append(["*", "*", "*", "#", "*", "*", "*"])
+        >>> grid2.append(["*", "*", "*", "*", "*", "*", "*"])
+        >>> grid2.append([".", ".", "*", "*", "*", ".", "."])
+        >>> grid2.append([".", ".", "*", "*", "*", ".", "."])
+        >>> gps2 = GridPegSolitairePuzzle(grid2, {"*", ".", "#"})
+        >>> gps1 == gps2
+        False
+        >>> grid3 = list()
+        >>> grid3.append([".", ".", "*", "*", "*", ".", "."])
+        >>> grid3.append(["*", ".", "*", "*", "*", ".", "."])
+        >>> grid3.append([".", "*", "*", "*", "*", "*", "*"])
+        >>> grid3.append(["*", "*", "*", "#", "*", "*", "*"])
+        >>> grid3.append(["*", "*", "*", "*", "*", "*", "*"])
+        >>> grid3.append([".", ".", "*", "*", "*", ".", "."])
+        >>> grid3.append([".", ".", "*", "*", "*", ".", "."])
+        >>> gps3 = GridPegSolitairePuzzle(grid3, {"*", ".", "#"})
+        >>> gps2 == gps3
+        True
+        >>> hash(gps2) == hash(gps3)
+        True
+        """
+        return self is other or (
+            type(self) == type(other) and self._pegs == other._pegs and
+            self._board == other._board)
+
+    __hash__ = Puzzle.__hash__
+
+    def __str__(self):
+        """
+        Return a picture of PegSolitairePuzzle self.
+
+        @type self: PegSolitairePuzzle
+        @rtype: str
+        """
+        return self._board.draw(self._pegs)
+
+    def __repr__(self):
+        """
+        Return a representation of PegSolitairePuzzle self.
+
+        @type self: PegSolitairePuzzle
+        @rtype: str
+
+        >>> PegSolitairePuzzle(PegBoard.triangle(2), [(1, 0), (1, 1)])
+        PegSolitairePuzzle(pegs=[(1, 0), (1, 1)])
+        """
+        return "PegSolitairePuzzle(pegs={})".format(self._pegs_coordinates())
+
+    def is_solved(self):
+        """
+        Return whether PegSolitairePuzzle self has a single peg left.
+
+        @type self: PegSolitairePuzzle
+        @rtype: bool
+
+        >>> PegSolitairePuzzle(PegBoard.triangle(2), [(1, 0)]).is_solved()
+        True
+        >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+        >>> grid1 = list()
+        >>> grid1.append([".", ".", ".", "*", ".", ".", "."])
+        >>> gps1 = GridPegSolitairePuzzle(grid1, {"*", ".", "#"})
+        >>> gps1.is_solved()
+        True
+        >>> grid2 = list()
+        >>> grid2.append([".", ".", "*", "*", "*", ".", "."])
+        >>> gps2 = GridPegSolitairePuzzle(grid2, {"*", ".", "#"})
+        >>> gps2.is_solved()
+        False
+        """
+        pegs = self._pegs
+        return pegs != 0 and pegs & (pegs - 1) == 0
+
+    def heuristic(self):
+        """
+        Return the number of pegs PegSolitairePuzzle self has left beyond
+        the single peg of a solution.
+
+        @type self: PegSolitairePuzzle
+        @rtype: int
+
+        >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+        >>> grid = list()
+        >>> grid.append([".", ".", "*", "*", "*", ".", "."])
+        >>> gps = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> gps.heuristic()
+        2
+        """
+        return bin(self._pegs).count("1") - 1
+
+    def score(self):
+        """
+        Return the number of pegs PegSolitairePuzzle self has left beyond
+        one, plus the number of pegs with no peg beside them, which cannot
+        move until another peg comes near.
+
+        @type self: PegSolitairePuzzle
+        @rtype: int
+
+        >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+        >>> grid = list()
+        >>> grid.append(["*", ".", "*", "*", ".", "."])
+        >>> gps = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> gps.score()
+        3
+        """
+        pegs, neighbours = self._pegs, self._board._neighbours
+        isolated = len([k for k in range(len(neighbours))
+                        if pegs >> k & 1 and not pegs & neighbours[k]])
+        return bin(pegs).count("1") - 1 + isolated
+
+    def key(self):
+        """
+        Return the bitset of the holes of PegSolitairePuzzle self that
+        hold pegs.
+
+        @type self: PegSolitairePuzzle
+        @rtype: int
+
+        >>> PegSolitairePuzzle(PegBoard.triangle(2), [(1, 0), (1, 1)]).key()
+        6
+        """
+        return self._pegs
+
+    def extensions(self):
+        """
+        Return list of extensions of PegSolitairePuzzle self, in the order
+        of the jumps of its board.
+
+        @type self: PegSolitairePuzzle
+        @rtype: list[PegSolitairePuzzle]
+
+        >>> board = PegBoard.grid(["...", "...", "..."], diagonal=True)
+        >>> p = PegSolitairePuzzle(board, [(0, 0), (0, 1), (1, 1)])
+        >>> [p.move_to(e) for e in p.extensions()]
+        [((0, 0), 'right'), ((0, 0), 'down-right'), ((0, 1), 'down')]
+        >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+        >>> grid1 = list()
+        >>> grid1.append([".", ".", "*", "*", "*", ".", "."])
+        >>> grid1.append([".", ".", "*", "*", "*", ".", "."])
+        >>> gps = GridPegSolitairePuzzle(grid1, {"*", ".", "#"})
+        >>> l1 = list(gps.extensions())
+        >>> l2 = list(gps.extensions())
+        >>> len(l1) == len(l2)
+        True
+        >>> all([s in l2 for s in l1])
+        True
+        >>> all([s in l1 for s in l2])
+        True
+        """
+        pegs = self._pegs
+        return [self._with(pegs ^ change)
+                for full, empty, change in self._board._masks
+                if pegs & full == full and not pegs & empty]
+
+    def move_to(self, other):
+        """
+        Return the move taking PegSolitairePuzzle self to its extension
+        other: the hole of the peg that jumps and the name of its step.
+
+        @type self: PegSolitairePuzzle
+        @type other: PegSolitairePuzzle
+        @rtype: tuple[tuple[int, int], str]
+
+        >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+        >>> grid = [["*", "*", ".", "*", "*"]]
+        >>> gps = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> [gps.move_to(e) for e in gps.extensions()]
+        [((0, 0), 'right'), ((0, 4), 'left')]
+        """
+        board = self._board
+        for n in board._by_change.get(self._pegs ^ other._pegs, []):
+            if self._pegs >> board.jumps[n][0] & 1:
+                return board.moves[n]
+        raise ValueError("{!r} does not follow {!r}".format(other, self))
+
+    def apply_move(self, move):
+        """
+        Return the extension of PegSolitairePuzzle self where the peg in
+        hole move[0] jumps by the step named move[1].
+
+        @type self: PegSolitairePuzzle
+        @type move: tuple[tuple[int, int], str]
+        @rtype: PegSolitairePuzzle
+
+        >>> p = PegSolitairePuzzle(PegBoard.triangle(3), [(2, 0), (2, 1)])
+        >>> p.apply_move(((2, 0), "right"))
+        PegSolitairePuzzle(pegs=[(2, 2)])
+        >>> p.apply_move(((2, 1), "left"))
+        Traceback (most recent call last):
+        ...
+        ValueError: illegal move ((2, 1), 'left')
+        >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+        >>> grid = [["*", "*", ".", "*", "*"]]
+        >>> gps = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> print(gps.apply_move(((0, 4), "left")))
+         *  *  *  .  .
+        """
+        n = self._board._move_numbers.get(tuple(move))
+        if n is not None:
+            full, empty, change = self._board._masks[n]
+            if self._pegs & full == full and not self._pegs & empty:
+                return self._with(self._pegs ^ change)
+        raise ValueError("illegal move {}".format(move))
+
+    def _pegs_coordinates(self):
+        """
+        Return the coordinates of the holes of PegSolitairePuzzle self that
+        hold pegs, in the order of the holes.
+
+        @type self: PegSolitairePuzzle
+        @rtype: list[tuple[int, int]]
+        """
+        return [h for k, h in enumerate(self._board.holes)
+                if self._pegs >> k & 1]
+
+
+def center_first(puzzle, extensions):
+    """
+    Return extensions of PegSolitairePuzzle puzzle ordered for
+    depth_first_solve: jumps landing nearer the centre of the board's holes
+    first, ties in the order of the board's jumps.
+
+    Whether a jump leaves pegs isolated is deliberately ignored: breaking
+    ties that way took the bundled 5x5 board from 36 expansions to 2753.
+    PegSolitairePuzzle.score() still counts isolated pegs for searches that
+    rank whole configurations.
+
+    @type puzzle: PegSolitairePuzzle
+    @type extensions: list[PegSolitairePuzzle]
+    @rtype: list[PegSolitairePuzzle]
+
+    >>> board = PegBoard.grid(["......."])
+    >>> p = PegSolitairePuzzle(board, [(0, 0), (0, 1), (0, 3), (0, 4)])
+    >>> [p.move_to(e) for e in center_first(p, p.extensions())]
+    [((0, 0), 'right'), ((0, 4), 'left'), ((0, 3), 'right')]
+    >>> board = PegBoard.triangle(4)
+    >>> p = PegSolitairePuzzle(board, board.holes[1:])
+    >>> [p.move_to(e) for e in center_first(p, p.extensions())]
+    [((2, 0), 'up-right'), ((2, 2), 'up-left')]
+    """
+    distances, pegs = puzzle._board._centre_distances, puzzle._pegs
+    # the hole a jump lands in is the one bit it sets
+    return sorted(extensions, key=lambda e: distances[
+        (e._pegs & ~pegs).bit_length() - 1])
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
+    from puzzle_tools import SearchStats, depth_first_solve
+    from time import time
+
+    triangle = PegBoard.triangle(5)
+    for empty in [(0, 0), (2, 1)]:
+        start, stats = time(), SearchStats()
+        solution = depth_first_solve(PegSolitairePuzzle(
+            triangle, [h for h in triangle.holes if h != empty]), stats,
+            moves=True)
+        print("Triangle with {} empty: {} moves, {} expansions, {:.2f} "
+              "seconds".format(empty, len(solution), stats.expanded,
+                               time() - start))
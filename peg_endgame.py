@@ -0,0 +1,282 @@
+"""
+Endgame databases for peg solitaire: every position of a board with at
+most a few pegs from which a single peg can still be reached.
+
+A database is built backward from the single-peg finishes by undoing jumps
+(a peg at the landing hole jumps back, restoring the peg it took), so it
+only ever holds winnable positions.  Positions are bitsets over the holes
+of the board, stored on disk after the board as a sorted array of
+fixed-width records that is searched by bisection in place.
+"""
+from struct import calcsize, pack, unpack_from
+from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+from peg_board import PegBoard, PegSolitairePuzzle
+from puzzle_codec import decode_board, encode_board
+
+_MAGIC = b"PEG2"
+# the most pegs, the size of the packed board and the number of positions
+_HEADER = ">BII"
+
+
+class EndgameDatabase:
+    """
+    The winnable positions of one peg solitaire board that have at most
+    max_pegs pegs.
+
+    A puzzle is in an EndgameDatabase when it is played on that board and
+    is one of its positions; finish(puzzle) then plays it out to one peg.
+    A puzzle on that board with at most max_pegs pegs that is not in it is
+    lost.
+    """
+
+    def __init__(self, board, max_pegs, records):
+        """
+        Create a new EndgameDatabase self of the positions packed in
+        records, sorted, of PegBoard board with at most max_pegs pegs.
+
+        @type self: EndgameDatabase
+        @type board: PegBoard
+        @type max_pegs: int
+        @type records: bytes
+        @rtype: None
+        """
+        self._board = board
+        self._width = (len(board.holes) + 7) // 8
+        self.max_pegs, self._records = max_pegs, records
+
+    @staticmethod
+    def build(puzzle, max_pegs):
+        """
+        Return the EndgameDatabase of the board of puzzle up to max_pegs
+        pegs, found by undoing jumps from every single-peg finish.
+
+        @type puzzle: PegSolitairePuzzle
+        @type max_pegs: int
+        @rtype: EndgameDatabase
+
+        >>> gps = GridPegSolitairePuzzle([["*", "*", ".", "#"]],
+        ...                              {"*", ".", "#"})
+        >>> db = EndgameDatabase.build(gps, 2)
+        >>> len(db)
+        5
+        >>> gps in db
+        True
+        >>> board = PegBoard.triangle(4)
+        >>> len(EndgameDatabase.build(PegSolitairePuzzle(board, []), 3))
+        55
+        """
+        board = puzzle._board
+        layer = set([1 << k for k in range(len(board.holes))])
+        found = set(layer)
+        for _ in range(1, max_pegs):
+            # undo a jump: the peg that landed goes back and the peg it
+            # jumped over returns
+            layer = set([position ^ change for position in layer
+                         for full, empty, change in board._masks
+                         if position & empty and not position & full])
+            found.update(layer)
+        width = (len(board.holes) + 7) // 8
+        return EndgameDatabase(board, max_pegs, b"".join(
+            [p.to_bytes(width, "big") for p in sorted(found)]))
+
+    def save(self, path):
+        """
+        Write EndgameDatabase self to the file at path.
+
+        @type self: EndgameDatabase
+        @type path: str
+        @rtype: None
+        """
+        board = encode_board(self._board)
+        with open(path, "wb") as f:
+            f.write(_MAGIC + pack(_HEADER, self.max_pegs, len(board),
+                                  len(self)))
+            f.write(board)
+            f.write(self._records)
+
+    @staticmethod
+    def load(path):
+        """
+        Return the EndgameDatabase saved in the file at path.
+
+        @type path: str
+        @rtype: EndgameDatabase
+
+        >>> import os, tempfile
+        >>> gps = GridPegSolitairePuzzle([["*", "*", ".", "#"]],
+        ...                              {"*", ".", "#"})
+        >>> path = os.path.join(tempfile.mkdtemp(), "endgame")
+        >>> EndgameDatabase.build(gps, 2).save(path)
+        >>> db = EndgameDatabase.load(path)
+        >>> len(db), gps in db
+        (5, True)
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("{} is not an endgame database".format(path))
+        offset = len(_MAGIC)
+        max_pegs, size, count = unpack_from(_HEADER, data, offset)
+        offset += calcsize(_HEADER)
+        board = decode_board(data[offset:offset + size])
+        database = EndgameDatabase(board, max_pegs, data[offset + size:])
+        if len(database) != count:
+            raise ValueError("{} is truncated".format(path))
+        return database
+
+    def __len__(self):
+        """
+        Return the number of positions in EndgameDatabase self.
+
+        @type self: EndgameDatabase
+        @rtype: int
+        """
+        return len(self._records) // self._width
+
+    def _has(self, position):
+        """
+        Return whether bitset position is in EndgameDatabase self.
+
+        @type self: EndgameDatabase
+        @type position: int
+        @rtype: bool
+        """
+        record, width = position.to_bytes(self._width, "big"), self._width
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._records[middle * width:(middle + 1) * width] < record:
+                low = middle + 1
+            else:
+                high = middle
+        return (low < len(self) and
+                self._records[low * width:(low + 1) * width] == record)
+
+    def _fits(self, puzzle):
+        """
+        Return whether puzzle is played on the board of EndgameDatabase
+        self.
+
+        @type self: EndgameDatabase
+        @type puzzle: PegSolitairePuzzle | Any
+        @rtype: bool
+        """
+        if not isinstance(puzzle, PegSolitairePuzzle):
+            return False
+        if puzzle._board is not self._board:
+            if puzzle._board != self._board:
+                return False
+            # puzzles share the board they were made with, so adopting it
+            # turns later checks into an identity test
+            self._board = puzzle._board
+        return True
+
+    def __contains__(self, puzzle):
+        """
+        Return whether puzzle is a winnable position of EndgameDatabase
+        self.
+
+        @type self: EndgameDatabase
+        @type puzzle: PegSolitairePuzzle | Any
+        @rtype: bool
+
+        >>> gps = GridPegSolitairePuzzle([["*", "*", ".", "#"]],
+        ...                              {"*", ".", "#"})
+        >>> db = EndgameDatabase.build(gps, 3)
+        >>> GridPegSolitairePuzzle([["*", ".", "*", "#"]],
+        ...                        {"*", ".", "#"}) in db
+        False
+        >>> GridPegSolitairePuzzle([["*", "*", ".", "."]], {"*", "."}) in db
+        False
+        """
+        if not self._fits(puzzle):
+            return False
+        position = puzzle.key()
+        return (bin(position).count("1") <= self.max_pegs and
+                self._has(position))
+
+    def lost(self, puzzle):
+        """
+        Return whether puzzle is played on the board of EndgameDatabase
+        self with few enough pegs for every winnable position with as many
+        to be in self, yet is not one of them: a dead end.
+
+        @type self: EndgameDatabase
+        @type puzzle: PegSolitairePuzzle | Any
+        @rtype: bool
+
+        >>> gps = GridPegSolitairePuzzle([["*", "*", ".", "#"]],
+        ...                              {"*", ".", "#"})
+        >>> db = EndgameDatabase.build(gps, 3)
+        >>> db.lost(GridPegSolitairePuzzle([["*", ".", "*", "#"]],
+        ...                                {"*", ".", "#"}))
+        True
+        >>> db.lost(gps)
+        False
+        """
+        if not self._fits(puzzle):
+            return False
+        position = puzzle.key()
+        return (bin(position).count("1") <= self.max_pegs and
+                not self._has(position))
+
+    def finish(self, puzzle):
+        """
+        Return the puzzles after puzzle, a position of EndgameDatabase self,
+        on a way to a single peg.
+
+        @type self: EndgameDatabase
+        @type puzzle: PegSolitairePuzzle
+        @rtype: list[PegSolitairePuzzle]
+
+        >>> grid = [["*", "*", ".", "*", "."]]
+        >>> gps = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> ["".join(p._marker[0])
+        ...  for p in EndgameDatabase.build(gps, 3).finish(gps)]
+        ['..**.', '....*']
+        """
+        if puzzle not in self:
+            raise ValueError("{!r} is not a winnable endgame".format(puzzle))
+        position, board = puzzle.key(), self._board
+        path = []
+        while position & (position - 1):
+            for n, (full, empty, change) in enumerate(board._masks):
+                after = position ^ change
+                if (position & full == full and not position & empty and
+                        self._has(after)):
+                    puzzle = puzzle.apply_move(board.moves[n])
+                    path.append(puzzle)
+                    position = after
+                    break
+        return path
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
+    from puzzle_tools import SearchStats, depth_first_solve
+    from time import time
+
+    # the 5x5 board with the middle hole of the top row empty
+    grid = [["*", "*", ".", "*", "*"],
+            ["*", "*", "*", "*", "*"],
+            ["*", "*", "*", "*", "*"],
+            ["*", "*", "*", "*", "*"],
+            ["*", "*", "*", "*", "*"]]
+    gpsp = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+    stats = SearchStats()
+    start = time()
+    depth_first_solve(gpsp, stats)
+    print("Without endgame database: {} expansions in {:.2f} seconds".format(
+        stats.expanded, time() - start))
+    for max_pegs in (8, 10):
+        start = time()
+        db = EndgameDatabase.build(gpsp, max_pegs)
+        print("Built {} positions of up to {} pegs in {:.2f} seconds.".format(
+            len(db), max_pegs, time() - start))
+        stats = SearchStats()
+        start = time()
+        depth_first_solve(gpsp, stats, endgame=db)
+        print("With it: {} expansions in {:.2f} seconds".format(
+            stats.expanded, time() - start))
@@ -2,8 +2,29 @@ class Puzzle:
     """"
     Snapshot of a full-information puzzle, which may be solved, unsolved,
     or even unsolvable.
+
+    Puzzles are not changed once created, so each may keep its hash in
+    _hash, computed once when it is created.
     """
 
+    def __hash__(self):
+        """
+        Return the hash of Puzzle self: _hash if it was set when self was
+        created, else the hash of key(), kept for later calls.
+
+        A subclass that overrides __eq__ must set __hash__ = Puzzle.__hash__
+        again, and an __eq__ that compares what key() does may reject
+        puzzles whose _hash differs before comparing anything else.
+
+        @type self: Puzzle
+        @rtype: int
+        """
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(self.key())
+            return self._hash
+
     def fail_fast(self):
         """
         Return True iff Puzzle self can never be extended to a solution.
@@ -16,6 +37,46 @@ class Puzzle:
         """
         return False
 
+    def heuristic(self):
+        """
+        Return an estimate of how far Puzzle self is from a solution, where
+        smaller is closer and 0 means no estimate is available.
+
+        Override this in a subclass where progress towards a solution
+        can be measured.
+
+        @type self: Puzzle
+        @rtype: int | float
+        """
+        return 0
+
+    def score(self):
+        """
+        Return how promising Puzzle self looks, where smaller is better.
+        Searches that must drop some configurations keep the best scored.
+
+        Override this in a subclass where a better ranking than
+        heuristic() is known.
+
+        @type self: Puzzle
+        @rtype: int | float
+        """
+        return self.heuristic()
+
+    def key(self):
+        """
+        Return a compact hashable value that tells configurations of
+        Puzzle self apart from the other configurations met while solving
+        the same puzzle.
+
+        Override this in a subclass where something cheaper than the
+        string representation identifies a configuration.
+
+        @type self: Puzzle
+        @rtype: Hashable
+        """
+        return str(self)
+
     def is_solved(self):
         """
         Return True iff Puzzle self is solved.
@@ -39,3 +100,31 @@ class Puzzle:
         @rtype: list[Puzzle]
         """
         raise NotImplementedError
+
+    def move_to(self, other):
+        """
+        Return the move that takes Puzzle self to other, one of its
+        extensions, in the compact form apply_move accepts.
+
+        This is an abstract method that must be implemented
+        in a subclass.
+
+        @type self: Puzzle
+        @type other: Puzzle
+        @rtype: Any
+        """
+        raise NotImplementedError
+
+    def apply_move(self, move):
+        """
+        Return the extension of Puzzle self reached by move, as returned by
+        move_to.
+
+        This is an abstract method that must be implemented
+        in a subclass.
+
+        @type self: Puzzle
+        @type move: Any
+        @rtype: Puzzle
+        """
+        raise NotImplementedError
@@ -0,0 +1,564 @@
+"""
+A compact binary format for puzzles and solution paths.
+
+A puzzle is packed as a one-byte tag naming its class followed by its
+configuration and goal.  A solution is its starting puzzle followed by the
+list of moves (see Puzzle.move_to) that solve it, so it costs a few bytes
+per step instead of a full board.  Word sets are never packed: a word
+ladder is decoded against a word set supplied by the receiver.
+
+Frames, each a 4-byte length followed by that many bytes, let many puzzles
+or solutions share one byte string or stream.
+"""
+from struct import calcsize, pack, unpack_from
+from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+from mn_puzzle import MNPuzzle
+from peg_board import PegBoard, PegSolitairePuzzle
+from sudoku_puzzle import SudokuPuzzle
+from puzzle_tools import MoveList
+from word_ladder_puzzle import WordLadderPuzzle
+
+_PEG, _MN, _SUDOKU, _LADDER = b"G", b"M", b"S", b"W"
+# peg solitaire on any other PegBoard, packed with its board
+_BOARD_PEG = b"P"
+# word ladders that may also insert or delete a letter
+_EDIT_LADDER = b"E"
+
+# peg markers and directions, in the order of their codes
+_MARKERS = "#.*"
+_DIRECTIONS = ["up", "down", "left", "right"]
+
+
+class _Reader:
+    """
+    A position in a byte string being decoded.
+    """
+
+    def __init__(self, data, offset=0):
+        """
+        Start reading data at offset.
+
+        @type self: _Reader
+        @type data: bytes
+        @type offset: int
+        @rtype: None
+        """
+        self.data, self.offset = data, offset
+
+    def take(self, fmt):
+        """
+        Return the values packed at the current position in struct format
+        fmt, and move past them.
+
+        @type self: _Reader
+        @type fmt: str
+        @rtype: tuple
+        """
+        values = unpack_from(fmt, self.data, self.offset)
+        self.offset += calcsize(fmt)
+        return values
+
+    def raw(self, size):
+        """
+        Return the next size bytes, and move past them.
+
+        @type self: _Reader
+        @type size: int
+        @rtype: bytes
+        """
+        self.offset += size
+        return self.data[self.offset - size:self.offset]
+
+    def text(self):
+        """
+        Return the next length-prefixed string, and move past it.
+
+        @type self: _Reader
+        @rtype: str
+        """
+        return self.raw(self.take(">H")[0]).decode()
+
+
+def _text(s):
+    """
+    Return s packed with its length.
+
+    @type s: str
+    @rtype: bytes
+    """
+    data = s.encode()
+    return pack(">H", len(data)) + data
+
+
+def _alphabet(symbols):
+    """
+    Return the sorted list of symbols packed with its length.
+
+    @type symbols: list[str]
+    @rtype: bytes
+    """
+    return pack(">H", len(symbols)) + b"".join([_text(s) for s in symbols])
+
+
+def encode_board(board):
+    """
+    Return PegBoard board packed into bytes: how it is drawn, its steps and
+    its holes.
+
+    @type board: PegBoard
+    @rtype: bytes
+
+    >>> board = PegBoard.triangle(3)
+    >>> decode_board(encode_board(board)) == board
+    True
+    """
+    return (pack(">BH", board._stagger, len(board._steps)) +
+            b"".join([_text(name) + pack(">bb", di, dj)
+                      for name, (di, dj) in board._steps]) +
+            pack(">H", len(board.holes)) +
+            b"".join([pack(">hh", i, j) for i, j in board.holes]))
+
+
+def _decode_board(reader):
+    """
+    Return the PegBoard packed at the position of reader, and move past it.
+
+    @type reader: _Reader
+    @rtype: PegBoard
+    """
+    stagger, count = reader.take(">BH")
+    steps = []
+    for _ in range(count):
+        name = reader.text()
+        steps.append((name, reader.take(">bb")))
+    holes = [reader.take(">hh") for _ in range(reader.take(">H")[0])]
+    return PegBoard(holes, steps, bool(stagger))
+
+
+def decode_board(data):
+    """
+    Return the PegBoard packed in data by encode_board.
+
+    @type data: bytes
+    @rtype: PegBoard
+    """
+    return _decode_board(_Reader(data))
+
+
+def encode(puzzle):
+    """
+    Return puzzle packed into bytes.
+
+    @type puzzle: Puzzle
+    @rtype: bytes
+
+    >>> len(encode(MNPuzzle((("1", "2"), ("3", "*")),
+    ...                     (("1", "2"), ("3", "*")))))
+    27
+    """
+    if isinstance(puzzle, GridPegSolitairePuzzle):
+        rows, cols = len(puzzle._marker), len(puzzle._marker[0])
+        codes = [_MARKERS.index(c) for row in puzzle._marker for c in row]
+        codes += [0] * (-len(codes) % 4)
+        cells = bytes([codes[i] | codes[i + 1] << 2 | codes[i + 2] << 4 |
+                       codes[i + 3] << 6 for i in range(0, len(codes), 4)])
+        allowed = sum([1 << _MARKERS.index(c) for c in puzzle._marker_set])
+        return _PEG + pack(">HHB", rows, cols, allowed) + cells
+    elif isinstance(puzzle, PegSolitairePuzzle):
+        board = puzzle._board
+        return (_BOARD_PEG + encode_board(board) +
+                puzzle._pegs.to_bytes((len(board.holes) + 7) // 8, "big"))
+    elif isinstance(puzzle, MNPuzzle):
+        symbols = sorted(set([s for row in puzzle.to_grid for s in row]) |
+                         set([s for row in puzzle.from_grid for s in row]))
+        return (_MN + pack(">BBBB", puzzle.n, puzzle.m, len(puzzle.to_grid),
+                           len(puzzle.to_grid[0])) + _alphabet(symbols) +
+                bytes([symbols.index(s) for grid in
+                       (puzzle.from_grid, puzzle.to_grid)
+                       for row in grid for s in row]))
+    elif isinstance(puzzle, SudokuPuzzle):
+        symbols = ["*"] + sorted(puzzle._symbol_set)
+        return (_SUDOKU + pack(">B", puzzle._n) + _alphabet(symbols[1:]) +
+                bytes([symbols.index(s) for s in puzzle._symbols]))
+    elif isinstance(puzzle, WordLadderPuzzle):
+        tag = _EDIT_LADDER if puzzle._mode == "edit" else _LADDER
+        return tag + _text(puzzle._from_word) + _text(puzzle._to_word)
+    raise TypeError("cannot encode {}".format(type(puzzle)))
+
+
+def _decode(reader, word_set):
+    """
+    Return the puzzle packed at the position of reader, and move past it.
+
+    @type reader: _Reader
+    @type word_set: set[str] | None
+    @rtype: Puzzle
+    """
+    tag = reader.raw(1)
+    if tag == _PEG:
+        rows, cols, allowed = reader.take(">HHB")
+        cells = reader.raw((rows * cols + 3) // 4)
+        codes = [b >> shift & 3 for b in cells for shift in (0, 2, 4, 6)]
+        marker = [[_MARKERS[codes[i * cols + j]] for j in range(cols)]
+                  for i in range(rows)]
+        return GridPegSolitairePuzzle(marker, set(
+            [c for k, c in enumerate(_MARKERS) if allowed >> k & 1]))
+    elif tag == _BOARD_PEG:
+        board = _decode_board(reader)
+        pegs = int.from_bytes(reader.raw((len(board.holes) + 7) // 8), "big")
+        return PegSolitairePuzzle(board, [h for k, h in enumerate(board.holes)
+                                          if pegs >> k & 1])
+    elif tag == _MN:
+        n, m, to_n, to_m = reader.take(">BBBB")
+        symbols = [reader.text() for _ in range(reader.take(">H")[0])]
+        cells = reader.raw(n * m + to_n * to_m)
+        from_grid = tuple([tuple([symbols[cells[i * m + j]]
+                                  for j in range(m)]) for i in range(n)])
+        to_grid = tuple([tuple([symbols[cells[n * m + i * to_m + j]]
+                                for j in range(to_m)]) for i in range(to_n)])
+        return MNPuzzle(from_grid, to_grid)
+    elif tag == _SUDOKU:
+        n = reader.take(">B")[0]
+        symbols = ["*"] + [reader.text() for _ in range(reader.take(">H")[0])]
+        return SudokuPuzzle(n, [symbols[d] for d in reader.raw(n * n)],
+                            set(symbols[1:]))
+    elif tag == _LADDER:
+        return WordLadderPuzzle(reader.text(), reader.text(), word_set)
+    elif tag == _EDIT_LADDER:
+        return WordLadderPuzzle(reader.text(), reader.text(), word_set, "edit")
+    raise ValueError("unknown puzzle tag {!r}".format(tag))
+
+
+def decode(data, word_set=None):
+    """
+    Return the puzzle packed in data by encode.  A word ladder uses
+    word_set, or the default dictionary if that is None.
+
+    @type data: bytes
+    @type word_set: set[str] | None
+    @rtype: Puzzle
+
+    >>> grid = [["*", "*", ".", "*", "*"]]
+    >>> gps = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+    >>> decode(encode(gps)) == gps
+    True
+    >>> board = PegBoard.triangle(4)
+    >>> p = PegSolitairePuzzle(board, board.holes[1:])
+    >>> decode(encode(p)) == p
+    True
+    >>> s = SudokuPuzzle(4, ["A", "B"] + ["*"] * 14, {"A", "B", "C", "D"})
+    >>> decode(encode(s)) == s
+    True
+    >>> w = WordLadderPuzzle("cat", "dog", {"cat", "dog"})
+    >>> decode(encode(w), w._word_set) == w
+    True
+    >>> w = WordLadderPuzzle("cat", "at", {"cat", "at"}, mode="edit")
+    >>> decode(encode(w), w._word_set) == w
+    True
+    """
+    return _decode(_Reader(data), word_set)
+
+
+class StateCodec:
+    """
+    Packs the configurations reachable from a starting puzzle into bytes of
+    one fixed width, leaving out everything they share with it: the goal,
+    the board, the alphabet and the word set.  A configuration is decoded
+    against the starting puzzle, which is kept in memory.
+    """
+
+    def __init__(self, template):
+        """
+        Create a new StateCodec self for the configurations reachable from
+        puzzle template.
+
+        @type self: StateCodec
+        @type template: Puzzle
+        @rtype: None
+        """
+        self.template = template
+        if isinstance(template, PegSolitairePuzzle):
+            self.width = (len(template._board.holes) + 7) // 8
+        elif isinstance(template, MNPuzzle):
+            self._symbols = sorted(set([s for row in template.from_grid
+                                        for s in row]))
+            self.width = template.n * template.m
+        elif isinstance(template, SudokuPuzzle):
+            self._symbols = ["*"] + sorted(template._symbol_set)
+            self.width = len(template._symbols)
+        elif isinstance(template, WordLadderPuzzle):
+            # a substitution keeps the length of the word; an edit may
+            # reach a word of any length in the set
+            words = [template._from_word]
+            if template._mode == "edit":
+                words.extend(template._word_set)
+            self.width = max([len(w.encode()) for w in words])
+        else:
+            raise TypeError("cannot encode {}".format(type(template)))
+        self._numbers = None
+        if isinstance(template, (MNPuzzle, SudokuPuzzle)):
+            self._numbers = dict([(c, k) for k, c in enumerate(self._symbols)])
+
+    def encode(self, puzzle):
+        """
+        Return the configuration of puzzle packed into StateCodec self's
+        width of bytes.
+
+        @type self: StateCodec
+        @type puzzle: Puzzle
+        @rtype: bytes
+
+        >>> m = MNPuzzle((("1", "2", "3"), ("4", "5", "*")),
+        ...              (("1", "2", "3"), ("4", "5", "*")))
+        >>> codec = StateCodec(m)
+        >>> len(codec.encode(m)), len(encode(m))
+        (6, 37)
+        """
+        if isinstance(puzzle, PegSolitairePuzzle):
+            return puzzle._pegs.to_bytes(self.width, "big")
+        elif isinstance(puzzle, MNPuzzle):
+            return bytes([self._numbers[s] for row in puzzle.from_grid
+                          for s in row])
+        elif isinstance(puzzle, SudokuPuzzle):
+            return bytes([self._numbers[s] for s in puzzle._symbols])
+        return puzzle._from_word.encode().ljust(self.width, b"\0")
+
+    def decode(self, data):
+        """
+        Return the puzzle whose configuration StateCodec self packed into
+        data, sharing the rest with self's starting puzzle.
+
+        @type self: StateCodec
+        @type data: bytes
+        @rtype: Puzzle
+
+        >>> board = PegBoard.triangle(4)
+        >>> p = PegSolitairePuzzle(board, board.holes[1:])
+        >>> codec = StateCodec(p)
+        >>> es = p.extensions()
+        >>> [codec.decode(codec.encode(e)) for e in es] == es
+        True
+        >>> s = SudokuPuzzle(4, ["A", "B"] + ["*"] * 14, {"A", "B", "C", "D"})
+        >>> StateCodec(s).decode(StateCodec(s).encode(s)) == s
+        True
+        >>> w = WordLadderPuzzle("cat", "at", {"cat", "at", "cart"}, "edit")
+        >>> codec = StateCodec(w)
+        >>> codec.encode(w), codec.decode(codec.encode(w.apply_move("at")))
+        (b'cat\\x00', WordLadderPuzzle(at -> at))
+        """
+        template = self.template
+        if isinstance(template, PegSolitairePuzzle):
+            return template._with(int.from_bytes(data, "big"))
+        elif isinstance(template, MNPuzzle):
+            m = template.m
+            return template._with(tuple(
+                [tuple([self._symbols[d] for d in data[i:i + m]])
+                 for i in range(0, len(data), m)]))
+        elif isinstance(template, SudokuPuzzle):
+            return SudokuPuzzle(template._n, [self._symbols[d] for d in data],
+                                template._symbol_set)
+        return WordLadderPuzzle(data.rstrip(b"\0").decode(),
+                                template._to_word, template._word_set,
+                                template._mode)
+
+
+def _encode_move(puzzle, move):
+    """
+    Return move of puzzle packed into bytes.
+
+    @type puzzle: Puzzle
+    @type move: Any
+    @rtype: bytes
+    """
+    if isinstance(puzzle, GridPegSolitairePuzzle):
+        (x, y), direction = move
+        cell = x * len(puzzle._marker[0]) + y
+        return pack(">H", cell * 4 + _DIRECTIONS.index(direction))
+    elif isinstance(puzzle, PegSolitairePuzzle):
+        return pack(">H", puzzle._board._move_numbers[tuple(move)])
+    elif isinstance(puzzle, MNPuzzle):
+        return bytes([_DIRECTIONS.index(move)])
+    elif isinstance(puzzle, SudokuPuzzle):
+        return pack(">HB", move[0], sorted(puzzle._symbol_set).index(move[1]))
+    return _text(move)
+
+
+def _decode_move(puzzle, reader):
+    """
+    Return the move of puzzle packed at the position of reader, and move
+    past it.
+
+    @type puzzle: Puzzle
+    @type reader: _Reader
+    @rtype: Any
+    """
+    if isinstance(puzzle, GridPegSolitairePuzzle):
+        code = reader.take(">H")[0]
+        cols = len(puzzle._marker[0])
+        return (code // 4 // cols, code // 4 % cols), _DIRECTIONS[code % 4]
+    elif isinstance(puzzle, PegSolitairePuzzle):
+        return puzzle._board.moves[reader.take(">H")[0]]
+    elif isinstance(puzzle, MNPuzzle):
+        return _DIRECTIONS[reader.raw(1)[0]]
+    elif isinstance(puzzle, SudokuPuzzle):
+        cell, d = reader.take(">HB")
+        return cell, sorted(puzzle._symbol_set)[d]
+    return reader.text()
+
+
+def solution_moves(path):
+    """
+    Return the puzzle at the root of path, a MoveList or a chain of
+    PuzzleNodes each with at most one child, and the list of moves along it.
+
+    @type path: PuzzleNode | MoveList
+    @rtype: tuple[Puzzle, list]
+    """
+    if isinstance(path, MoveList):
+        return path.start, path.moves
+    start, moves, node = path.puzzle, [], path
+    while node.children:
+        moves.append(node.puzzle.move_to(node.children[0].puzzle))
+        node = node.children[0]
+    return start, moves
+
+
+def encode_solution(path):
+    """
+    Return path, as returned by the solvers, packed as its starting puzzle
+    and its moves.
+
+    @type path: PuzzleNode | MoveList
+    @rtype: bytes
+
+    >>> from puzzle_tools import breadth_first_solve
+    >>> target = (("1", "2", "3"), ("4", "5", "*"))
+    >>> path = breadth_first_solve(MNPuzzle((("*", "2", "3"), ("1", "4", "5")),
+    ...                                     target))
+    >>> start, moves = decode_solution(encode_solution(path))
+    >>> moves
+    ['down', 'right', 'right']
+    """
+    start, moves = solution_moves(path)
+    return (encode(start) + pack(">I", len(moves)) +
+            b"".join([_encode_move(start, move) for move in moves]))
+
+
+def decode_solution(data, word_set=None):
+    """
+    Return the starting puzzle and the list of moves packed in data by
+    encode_solution.
+
+    @type data: bytes
+    @type word_set: set[str] | None
+    @rtype: tuple[Puzzle, list]
+
+    >>> w = WordLadderPuzzle("cat", "dog", {"cat", "cot", "cog", "dog"})
+    >>> from puzzle_tools import breadth_first_solve
+    >>> decode_solution(encode_solution(breadth_first_solve(w)), w._word_set)
+    (WordLadderPuzzle(cat -> dog), ['cot', 'cog', 'dog'])
+    """
+    reader = _Reader(data)
+    start = _decode(reader, word_set)
+    return start, [_decode_move(start, reader)
+                   for _ in range(reader.take(">I")[0])]
+
+
+def frame(payload):
+    """
+    Return payload prefixed with its length.
+
+    @type payload: bytes
+    @rtype: bytes
+
+    >>> frame(b"ab")
+    b'\\x00\\x00\\x00\\x02ab'
+    """
+    return pack(">I", len(payload)) + payload
+
+
+def unframe(data):
+    """
+    Yield the payloads of the frames that make up data.
+
+    @type data: bytes
+    @rtype: Iterator[bytes]
+
+    >>> list(unframe(frame(b"ab") + frame(b"") + frame(b"c")))
+    [b'ab', b'', b'c']
+    """
+    offset = 0
+    while offset < len(data):
+        size = unpack_from(">I", data, offset)[0]
+        yield data[offset + 4:offset + 4 + size]
+        offset += 4 + size
+
+
+def encode_many(puzzles):
+    """
+    Return puzzles packed, in order, into one byte string.
+
+    @type puzzles: list[Puzzle]
+    @rtype: bytes
+    """
+    return b"".join([frame(encode(p)) for p in puzzles])
+
+
+def decode_many(data, word_set=None):
+    """
+    Return the list of puzzles packed into data by encode_many.
+
+    @type data: bytes
+    @type word_set: set[str] | None
+    @rtype: list[Puzzle]
+
+    >>> ms = [MNPuzzle((("1", "*"),), (("*", "1"),)),
+    ...       MNPuzzle((("*", "1"),), (("*", "1"),))]
+    >>> decode_many(encode_many(ms)) == ms
+    True
+    """
+    return [decode(payload, word_set) for payload in unframe(data)]
+
+
+def dump_solutions(paths, stream):
+    """
+    Write each of paths to the binary stream as a framed solution, one at a
+    time, and return how many were written.
+
+    @type paths: Iterable[PuzzleNode | MoveList]
+    @type stream: BinaryIO
+    @rtype: int
+    """
+    count = 0
+    for path in paths:
+        stream.write(frame(encode_solution(path)))
+        count += 1
+    return count
+
+
+def load_solutions(stream, word_set=None):
+    """
+    Yield the (starting puzzle, moves) of each solution written to the
+    binary stream by dump_solutions, reading one frame at a time.
+
+    @type stream: BinaryIO
+    @type word_set: set[str] | None
+    @rtype: Iterator[tuple[Puzzle, list]]
+
+    >>> from io import BytesIO
+    >>> from puzzle_tools import depth_first_solve
+    >>> gps = GridPegSolitairePuzzle([["*", "*", "."]], {"*", ".", "#"})
+    >>> stream = BytesIO()
+    >>> dump_solutions([depth_first_solve(gps)], stream)
+    1
+    >>> stream.seek(0)
+    0
+    >>> list(load_solutions(stream))[0][1]
+    [((0, 0), 'right')]
+    """
+    while True:
+        header = stream.read(4)
+        if len(header) < 4:
+            return
+        yield decode_solution(stream.read(unpack_from(">I", header)[0]),
+                              word_set)
@@ -0,0 +1,291 @@
+"""
+Report where a solve spends its time and memory.
+
+Run through puzzle_tools, as
+
+    python -m puzzle_tools profile SPEC [--solver NAME] [--folded PATH]
+
+where SPEC names a puzzle (see parse_spec).  The solve is run under
+cProfile for a table of the functions it spent most time in, each charged
+its own time only, with totals by module; then under tracemalloc, for the
+lines holding the most memory when the search was at its largest; and,
+with --folded, under a sampling timer, for stacks in the folded format
+flame graph tools read.
+"""
+import argparse
+import cProfile
+from collections import Counter
+import linecache
+import os
+import pstats
+import signal
+import sys
+import tracemalloc
+from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+from mn_puzzle import MNPuzzle
+import puzzle_tools
+from sudoku_batch import parse_line
+from sudoku_generator import default_symbols
+from sudoku_solver import from_board
+from word_ladder_puzzle import WordLadderPuzzle
+
+# solvers that can be profiled, by the name given on the command line
+SOLVERS = dict([(name[:-len("_solve")], getattr(puzzle_tools, name))
+                for name in dir(puzzle_tools) if name.endswith("_solve")])
+
+
+def parse_spec(spec):
+    """
+    Return the puzzle named by spec, one of
+
+        peg:ROW/ROW/...      a peg board, "*" for pegs, "." for holes and
+                             "#" for unused positions
+        mn:ROW/ROW/...       an MNPuzzle, "*" for the blank, to be put in
+                             order with the blank last
+        sudoku:LINE          a sudoku in the format of sudoku_batch
+        ladder:FROM:TO[:edit]  a word ladder over words.txt
+
+    @type spec: str
+    @rtype: Puzzle
+
+    >>> parse_spec("peg:**.#")
+    GridPegSolitairePuzzle([['*', '*', '.', '#']])
+    >>> parse_spec("mn:2*/13").to_grid
+    (('1', '2'), ('3', '*'))
+    >>> parse_spec("ladder:same:cost")
+    WordLadderPuzzle(same -> cost)
+    >>> parse_spec("rubik:x")
+    Traceback (most recent call last):
+    ...
+    ValueError: unknown puzzle spec rubik:x
+    """
+    kind, _, rest = spec.partition(":")
+    if kind == "peg":
+        return GridPegSolitairePuzzle([list(row) for row in rest.split("/")],
+                                      {"*", ".", "#"})
+    elif kind == "mn":
+        from_grid = tuple([tuple(row) for row in rest.split("/")])
+        tiles = sorted([t for row in from_grid for t in row if t != "*"])
+        tiles.append("*")
+        width = len(from_grid[0])
+        to_grid = tuple([tuple(tiles[i:i + width])
+                         for i in range(0, len(tiles), width)])
+        return MNPuzzle(from_grid, to_grid)
+    elif kind == "sudoku":
+        n, board = parse_line(rest)
+        return from_board(n, board, default_symbols(n))
+    elif kind == "ladder":
+        words = rest.split(":")
+        return WordLadderPuzzle(words[0], words[1], None, *words[2:])
+    raise ValueError("unknown puzzle spec {}".format(spec))
+
+
+def _module(filename):
+    """
+    Return the name of the module defined in filename, as the report
+    shows it.
+
+    @type filename: str
+    @rtype: str
+
+    >>> _module("/x/puzzle_tools.py"), _module("~")
+    ('puzzle_tools', 'builtins')
+    """
+    if filename == "~":
+        return "builtins"
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def time_report(profile, top=20):
+    """
+    Return a report of the top functions of cProfile.Profile profile by
+    their own time, and of their own time summed by module.
+
+    @type profile: cProfile.Profile
+    @type top: int
+    @rtype: str
+    """
+    entries = pstats.Stats(profile).stats
+    total = sum([entry[2] for entry in entries.values()]) or 1.0
+    lines = ["{:>8} {:>6} {:>8} {:>8}  function".format(
+        "own s", "own %", "total s", "calls")]
+    ranked = sorted(entries.items(), key=lambda item: -item[1][2])
+    for (filename, line, name), (_, calls, own, cumulative, _) in \
+            ranked[:top]:
+        where = ("{}:{}({})".format(_module(filename), line, name)
+                 if filename != "~" else name)
+        lines.append("{:8.3f} {:6.1f} {:8.3f} {:8}  {}".format(
+            own, 100 * own / total, cumulative, calls, where))
+    by_module = Counter()
+    for (filename, _, _), entry in entries.items():
+        by_module[_module(filename)] += entry[2]
+    lines.append("")
+    lines.append("own time by module: " + ", ".join(
+        ["{} {:.1f}%".format(module, 100 * own / total)
+         for module, own in by_module.most_common()]))
+    return "\n".join(lines)
+
+
+def memory_report(snapshot, peak, top=10):
+    """
+    Return a report of the source lines that allocated the most memory
+    still held in tracemalloc snapshot, taken when peak bytes were traced.
+
+    @type snapshot: tracemalloc.Snapshot
+    @type peak: int
+    @type top: int
+    @rtype: str
+    """
+    lines = ["{:>10} {:>8}  line".format("KiB", "blocks")]
+    statistics = snapshot.statistics("lineno")
+    for stat in statistics[:top]:
+        frame = stat.traceback[0]
+        lines.append("{:10.1f} {:8}  {}:{}  {}".format(
+            stat.size / 1024, stat.count, _module(frame.filename),
+            frame.lineno,
+            linecache.getline(frame.filename, frame.lineno).strip()))
+    by_module = Counter()
+    for stat in statistics:
+        by_module[_module(stat.traceback[0].filename)] += stat.size
+    lines.append("")
+    lines.append("peak {:.1f} KiB traced; held at the largest sample by "
+                 "module: {}".format(peak / 1024, ", ".join(
+                     ["{} {:.1f} KiB".format(module, size / 1024)
+                      for module, size in by_module.most_common(5)])))
+    return "\n".join(lines)
+
+
+def _stack(frame, root):
+    """
+    Return the call stack ending in frame, outermost first, in the folded
+    stack format, leaving out the call of code root and its callers.
+
+    @type frame: frame
+    @type root: code
+    @rtype: str
+    """
+    names = []
+    while frame is not None and frame.f_code is not root:
+        names.append("{}.{}".format(_module(frame.f_code.co_filename),
+                                    frame.f_code.co_name))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def folded_stacks(run, interval=0.001):
+    """
+    Return run() and a Counter of the call stacks run was found in, each
+    interval seconds of processor time.
+
+    @type run: () -> Any
+    @type interval: float
+    @rtype: tuple[Any, Counter]
+    """
+    samples = Counter()
+
+    def _sample(signum, frame):
+        samples[_stack(frame, run.__code__)] += 1
+
+    previous = signal.signal(signal.SIGPROF, _sample)
+    signal.setitimer(signal.ITIMER_PROF, interval, interval)
+    try:
+        result = run()
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+    return result, samples
+
+
+def profile(puzzle, solver, seconds=None, top=20, folded=None):
+    """
+    Return a report on solving puzzle with solver, stopping after seconds
+    if given, showing top entries per table, and write folded stacks to
+    the file at path folded if given.
+
+    @type puzzle: Puzzle
+    @type solver: (Puzzle, ...) -> Any
+    @type seconds: float | None
+    @type top: int
+    @type folded: str | None
+    @rtype: str
+    """
+    budget = (None if seconds is None else
+              puzzle_tools.SearchBudget(seconds=seconds))
+
+    def _run(stats=None):
+        return solver(puzzle, stats=stats, budget=budget, moves=True)
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(_run)
+    if isinstance(result, puzzle_tools.SearchResult):
+        if result.limit_hit:
+            result = "stopped by the {} budget after {} nodes".format(
+                result.limit, result.nodes)
+        else:
+            result = result.solution
+    if isinstance(result, puzzle_tools.MoveList):
+        result = "solved in {} moves".format(len(result))
+    report = ["{}: {}".format(solver.__name__, result or "no solution"), "",
+              time_report(profiler, top), ""]
+
+    # snapshot whenever the memory traced has grown by a tenth since the
+    # last snapshot
+    largest = {"size": 0, "snapshot": None}
+
+    def _sample(stats):
+        size = tracemalloc.get_traced_memory()[0]
+        if size > 1.1 * largest["size"]:
+            largest["size"] = size
+            largest["snapshot"] = tracemalloc.take_snapshot()
+
+    tracemalloc.start()
+    try:
+        _run(puzzle_tools.SearchStats(100, _sample))
+        peak = tracemalloc.get_traced_memory()[1]
+        if largest["snapshot"] is None:
+            largest["snapshot"] = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    report.append(memory_report(largest["snapshot"].filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]), peak, top // 2))
+
+    if folded is not None:
+        _, samples = folded_stacks(_run)
+        with open(folded, "w") as f:
+            for stack, count in sorted(samples.items()):
+                f.write("{} {}\n".format(stack, count))
+        report.append("")
+        report.append("wrote {} samples to {}".format(
+            sum(samples.values()), folded))
+    return "\n".join(report)
+
+
+def main(argv=None):
+    """
+    Print a profile of the solve described by command-line arguments argv
+    (sys.argv[1:] if None).
+
+    @type argv: list[str] | None
+    @rtype: None
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m puzzle_tools profile",
+        description="Profile solving one puzzle.")
+    parser.add_argument("spec", help="the puzzle: peg:ROW/..., mn:ROW/..., "
+                                     "sudoku:LINE or ladder:FROM:TO[:edit]")
+    parser.add_argument("--solver", choices=sorted(SOLVERS),
+                        default="depth_first")
+    parser.add_argument("--seconds", type=float, default=None,
+                        help="stop each run after this long")
+    parser.add_argument("--top", type=int, default=20,
+                        help="rows in the time table (half as many for "
+                             "memory)")
+    parser.add_argument("--folded", metavar="PATH", default=None,
+                        help="write folded stacks for flame graphs here")
+    args = parser.parse_args(argv)
+    print(profile(parse_spec(args.spec), SOLVERS[args.solver], args.seconds,
+                  args.top, args.folded))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
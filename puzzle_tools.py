@@ -3,116 +3,1043 @@ Some functions for working with puzzles
 """
 from puzzle import Puzzle
 from collections import deque
+from heapq import heappop, heappush, nsmallest
+from operator import methodcaller
+from time import perf_counter
 
-# set higher recursion limit
-# which is needed in PuzzleNode.__str__
-# uncomment the next two lines on a unix platform, say CDF
-# import resource
-# resource.setrlimit(resource.RLIMIT_STACK, (2**29, -1))
-import sys
-sys.setrecursionlimit(10**6)
+# untimed probes used by the solvers when no SearchStats is supplied
+_is_solved = methodcaller("is_solved")
+_fail_fast = methodcaller("fail_fast")
+_extensions = methodcaller("extensions")
+_key = methodcaller("key")
+_score = methodcaller("score")
 
 
-def depth_first_solve(puzzle):
+class SearchStats:
+    """
+    Counters and timings collected while a solver runs.
+
+    Pass an instance as the stats argument of a solver; the solver fills it
+    in as it goes.  Solvers called without stats skip all bookkeeping.
+
+    generated - number of PuzzleNodes created from extensions()
+    expanded - number of PuzzleNodes whose extensions() were generated
+    duplicates - number of nodes discarded because their configuration
+                 had already been seen
+    pruned - number of nodes cut off because fail_fast() was True
+    max_depth - greatest depth of a node taken off the frontier
+    max_frontier - greatest number of nodes waiting on the frontier
+    times - seconds spent in extensions(), is_solved(), fail_fast()
+            and computing state keys ("hashing")
+    """
+
+    def __init__(self, sample_every=0, on_sample=None):
+        """
+        Create a new SearchStats self, calling on_sample(self) after every
+        sample_every expanded nodes if both are given.
+
+        @type self: SearchStats
+        @type sample_every: int
+        @type on_sample: (SearchStats) -> Any | None
+        @rtype: None
+
+        >>> s = SearchStats()
+        >>> s.generated, s.expanded, s.duplicates, s.pruned
+        (0, 0, 0, 0)
+        """
+        self.generated, self.expanded = 0, 0
+        self.duplicates, self.pruned = 0, 0
+        self.max_depth, self.max_frontier = 0, 0
+        self.times = {"extensions": 0.0, "is_solved": 0.0,
+                      "fail_fast": 0.0, "hashing": 0.0}
+        self.sample_every, self.on_sample = sample_every, on_sample
+
+    def __str__(self):
+        """
+        Return a one-paragraph report of SearchStats self.
+
+        @type self: SearchStats
+        @rtype: str
+
+        >>> print(SearchStats())
+        generated 0, expanded 0, duplicates 0, pruned 0
+        max depth 0, max frontier 0
+        extensions 0.000s, is_solved 0.000s, fail_fast 0.000s, hashing 0.000s
+        """
+        return ("generated {}, expanded {}, duplicates {}, pruned {}\n"
+                "max depth {}, max frontier {}\n"
+                "{}").format(self.generated, self.expanded, self.duplicates,
+                             self.pruned, self.max_depth, self.max_frontier,
+                             ", ".join(["{} {:.3f}s".format(k, v) for k, v in
+                                        self.times.items()]))
+
+    def timed(self, name, f):
+        """
+        Return a function that calls f and adds the time it took to
+        self.times[name].
+
+        @type self: SearchStats
+        @type name: str
+        @type f: (Any) -> Any
+        @rtype: (Any) -> Any
+
+        >>> s = SearchStats()
+        >>> timed_len = s.timed("len", len)
+        >>> timed_len("abc")
+        3
+        >>> s.times["len"] >= 0
+        True
+        """
+        times = self.times
+        times.setdefault(name, 0.0)
+
+        def _timed(x):
+            start = perf_counter()
+            result = f(x)
+            times[name] += perf_counter() - start
+            return result
+
+        return _timed
+
+    def record_expansion(self, depth, frontier, generated):
+        """
+        Record that a node at depth was expanded into generated children,
+        leaving frontier nodes waiting, and call on_sample when due.
+
+        @type self: SearchStats
+        @type depth: int
+        @type frontier: int
+        @type generated: int
+        @rtype: None
+
+        >>> samples = []
+        >>> s = SearchStats(2, samples.append)
+        >>> for d in range(5):
+        ...     s.record_expansion(d, 10 - d, 3)
+        >>> s.expanded, s.generated, s.max_depth, s.max_frontier, len(samples)
+        (5, 15, 4, 10, 2)
+        """
+        self.expanded += 1
+        self.generated += generated
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if frontier > self.max_frontier:
+            self.max_frontier = frontier
+        if (self.on_sample is not None and self.sample_every and
+                self.expanded % self.sample_every == 0):
+            self.on_sample(self)
+
+
+class SearchBudget:
+    """
+    Limits on how much work a solver may do before giving up.
+
+    max_nodes - most nodes the solver may expand
+    seconds - most wall-clock seconds the solver may run for
+    max_seen - most configurations the solver may remember as seen
+
+    Any limit left as None is unbounded.
+    """
+
+    def __init__(self, max_nodes=None, seconds=None, max_seen=None):
+        """
+        Create a new SearchBudget self.
+
+        @type self: SearchBudget
+        @type max_nodes: int | None
+        @type seconds: float | None
+        @type max_seen: int | None
+        @rtype: None
+        """
+        self.max_nodes, self.seconds, self.max_seen = (max_nodes, seconds,
+                                                       max_seen)
+
+    def __repr__(self):
+        """
+        Represent SearchBudget self as a string that can be evaluated to
+        produce an equivalent SearchBudget.
+
+        @type self: SearchBudget
+        @rtype: str
+
+        >>> SearchBudget(max_nodes=10)
+        SearchBudget(max_nodes=10, seconds=None, max_seen=None)
+        """
+        return "SearchBudget(max_nodes={}, seconds={}, max_seen={})".format(
+            self.max_nodes, self.seconds, self.max_seen)
+
+
+class SearchResult:
+    """
+    Outcome of a solver run under a SearchBudget.
+
+    solution - path to a solution as returned without a budget, or None
+    limit - "nodes", "time" or "seen" if that budget ran out, else None
+    best - path to the expanded node with the smallest heuristic(),
+           the best partial solution found so far
+    nodes - number of nodes expanded
+    """
+
+    def __init__(self, solution, limit, best, nodes):
+        """
+        Create a new SearchResult self.
+
+        @type self: SearchResult
+        @type solution: PuzzleNode | MoveList | None
+        @type limit: str | None
+        @type best: PuzzleNode | MoveList | None
+        @type nodes: int
+        @rtype: None
+        """
+        self.solution, self.limit = solution, limit
+        self.best, self.nodes = best, nodes
+
+    def __repr__(self):
+        """
+        Represent SearchResult self as a string.
+
+        @type self: SearchResult
+        @rtype: str
+
+        >>> SearchResult(None, "time", None, 3)
+        SearchResult(solved=False, limit='time', nodes=3)
+        """
+        return "SearchResult(solved={}, limit={!r}, nodes={})".format(
+            self.solution is not None, self.limit, self.nodes)
+
+    @property
+    def limit_hit(self):
+        """
+        Return whether a budget ran out before the search finished.
+
+        @type self: SearchResult
+        @rtype: bool
+
+        >>> SearchResult(None, None, None, 3).limit_hit
+        False
+        """
+        return self.limit is not None
+
+
+class _Meter:
+    """
+    Running account of one solver run against a SearchBudget.
+    """
+
+    def __init__(self, budget, moves=False):
+        """
+        Start metering a search against budget, reporting paths as
+        MoveLists if moves is True.
+
+        @type self: _Meter
+        @type budget: SearchBudget
+        @type moves: bool
+        @rtype: None
+        """
+        self._budget, self._moves, self.nodes = budget, moves, 0
+        self.best, self._best_score = None, None
+        self._deadline = (None if budget.seconds is None else
+                          perf_counter() + budget.seconds)
+
+    def charge(self, node, seen):
+        """
+        Return the name of the first limit that has run out before node
+        can be expanded with seen configurations remembered, or None after
+        charging the expansion of node.  A node refused by a limit is
+        neither counted nor considered for best.
+
+        @type self: _Meter
+        @type node: PuzzleNode
+        @type seen: int
+        @rtype: str | None
+        """
+        budget = self._budget
+        if budget.max_nodes is not None and self.nodes >= budget.max_nodes:
+            return "nodes"
+        elif budget.max_seen is not None and seen > budget.max_seen:
+            return "seen"
+        elif self._deadline is not None and perf_counter() > self._deadline:
+            return "time"
+        self.nodes += 1
+        score = node.puzzle.heuristic()
+        if self._best_score is None or score < self._best_score:
+            self.best, self._best_score = node, score
+        return None
+
+    def result(self, solution, limit=None):
+        """
+        Return the SearchResult of this run.
+
+        @type self: _Meter
+        @type solution: PuzzleNode | MoveList | None
+        @type limit: str | None
+        @rtype: SearchResult
+        """
+        best = solution
+        if best is None and self.best is not None:
+            best = _path(self.best, self._moves)
+        return SearchResult(solution, limit, best, self.nodes)
+
+
+def _finish(solution, meter):
+    """
+    Return solution as the solvers report it: unchanged without a budget,
+    wrapped in a SearchResult with one.
+
+    @type solution: PuzzleNode | MoveList | None
+    @type meter: _Meter | None
+    @rtype: PuzzleNode | MoveList | SearchResult | None
+    """
+    return solution if meter is None else meter.result(solution)
+
+
+def _probes(stats, key=_key):
+    """
+    Return the functions a solver uses to hash, test and extend puzzles,
+    timed through stats unless stats is None.
+
+    @type stats: SearchStats | None
+    @type key: (Puzzle) -> Any
+    @rtype: tuple
+    """
+    if stats is None:
+        return key, _is_solved, _fail_fast, _extensions
+    return (stats.timed("hashing", key),
+            stats.timed("is_solved", _is_solved),
+            stats.timed("fail_fast", _fail_fast),
+            stats.timed("extensions", _extensions))
+
+
+def depth_first_solve(puzzle, stats=None, budget=None, moves=False,
+                      order=None, endgame=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child containing an extension of the puzzle
     in its parent.  Return None if this is not possible.
 
+    If stats is given, record the progress of the search in it.  If budget
+    is given, stop when it runs out and return a SearchResult instead.  If
+    moves is True, return the path as a MoveList.
+
+    If order is given, order(puzzle, extensions) decides the order in which
+    the extensions of each puzzle are tried.  If order has a learn method,
+    learn(parent, puzzle, depth, expanded) is called for each puzzle the
+    search reaches at depth from parent, with expanded False when it is a
+    dead end (fail_fast() or no extensions); see HistoryHeuristic.
+
+    If endgame is given, the search stops at the first puzzle in endgame
+    and follows endgame.finish(puzzle), the puzzles leading from it to a
+    solution.  If endgame has a lost method, puzzles for which
+    lost(puzzle) is True are pruned as dead ends.  See
+    peg_endgame.EndgameDatabase.
+
     @type puzzle: Puzzle
-    @rtype: PuzzleNode
+    @type stats: SearchStats | None
+    @type budget: SearchBudget | None
+    @type moves: bool
+    @type order: (Puzzle, list[Puzzle]) -> list[Puzzle] | None
+    @type endgame: Container[Puzzle] | None
+    @rtype: PuzzleNode | MoveList | SearchResult
 
-    Example not feasible due to the requirement of
-    instantiation of large amount of variables
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cat", "cot", "cog", "dog", "dot"}
+    >>> stats = SearchStats()
+    >>> path = depth_first_solve(WordLadderPuzzle("cat", "dog", ws), stats)
+    >>> path.puzzle
+    WordLadderPuzzle(cat -> dog)
+    >>> stats.expanded > 0
+    True
+    >>> ws = {"cat", "cot", "cog", "dot", "dig"}
+    >>> depth_first_solve(WordLadderPuzzle("cat", "dog", ws),
+    ...                   budget=SearchBudget(max_nodes=2))
+    SearchResult(solved=False, limit='nodes', nodes=2)
     """
+    key, solved, failed, extend = _probes(stats)
+    meter = None if budget is None else _Meter(budget, moves)
+    learn = getattr(order, "learn", None)
+    lost = getattr(endgame, "lost", None)
 
-    # dictionary of string representation of the puzzle configurations that has
-    # been seen
-    seen_config = {}
+    # set of the keys of the puzzle configurations that have been seen
+    seen_config = set()
 
-    p_node = PuzzleNode(puzzle)
+    # stack of (node, depth) still to explore; children are pushed in
+    # reverse so they are explored in the order extensions() returns them
+    pending = [(PuzzleNode(puzzle), 0)]
+
+    while pending:
+        puzzle_node, depth = pending.pop()
+        config = key(puzzle_node.puzzle)
 
-    def _find_sol(puzzle_node):
-        """
-        @type puzzle_node: PuzzleNode
-        @rtype: PuzzleNode
-        """
         # if the puzzle configuration is already seen then we ignore it
-        if str(puzzle_node.puzzle) in seen_config:
-            return None
+        if config in seen_config:
+            if stats is not None:
+                stats.duplicates += 1
 
-        # when puzzle solved, return the node
-        elif puzzle_node.puzzle.is_solved():
-            return puzzle_node
+        # when puzzle solved, return the path to the node
+        elif solved(puzzle_node.puzzle):
+            return _finish(_path(puzzle_node, moves), meter)
 
-        # if fail_function is true, add the configuration to seen_config
-        elif puzzle_node.puzzle.fail_fast():
-            seen_config[str(puzzle_node.puzzle)] = True
-            return None
+        # when the rest of the way is known, follow it to the solution
+        elif endgame is not None and puzzle_node.puzzle in endgame:
+            for i in endgame.finish(puzzle_node.puzzle):
+                puzzle_node = PuzzleNode(i, parent=puzzle_node)
+            return _finish(_path(puzzle_node, moves), meter)
 
         else:
             # save the configuration as already seen
-            seen_config[str(puzzle_node.puzzle)] = True
+            seen_config.add(config)
+
+            if meter is not None:
+                limit = meter.charge(puzzle_node, len(seen_config))
+                if limit is not None:
+                    return meter.result(None, limit)
+
+            if failed(puzzle_node.puzzle) or (lost is not None and
+                                              lost(puzzle_node.puzzle)):
+                if stats is not None:
+                    stats.pruned += 1
+                if learn is not None and puzzle_node.parent is not None:
+                    learn(puzzle_node.parent.puzzle, puzzle_node.puzzle,
+                          depth, False)
+                continue
+
+            extensions = extend(puzzle_node.puzzle)
+            if order is not None:
+                extensions = order(puzzle_node.puzzle, extensions)
+            if learn is not None and puzzle_node.parent is not None:
+                learn(puzzle_node.parent.puzzle, puzzle_node.puzzle, depth,
+                      len(extensions) > 0)
 
             # set the puzzle_node's children into the puzzle's extensions
             # with puzzle_node as the parent
-
             children = [PuzzleNode(i, parent=puzzle_node) for i in
-                        puzzle_node.puzzle.extensions()]
+                        extensions]
+            for i in reversed(children):
+                pending.append((i, depth + 1))
 
-            for i in children:
-                # return path if it reaches towards a solution
-                path = _find_sol(i)
-                if path:
-                    return path
+            if stats is not None:
+                stats.record_expansion(depth, len(pending), len(children))
+    return _finish(None, meter)
 
-    return _one_path(_find_sol(p_node))
 
-
-def breadth_first_solve(puzzle):
+def breadth_first_solve(puzzle, stats=None, budget=None, moves=False):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child PuzzleNode containing an extension
     of the puzzle in its parent.  Return None if this is not possible.
 
+    If stats is given, record the progress of the search in it.  If budget
+    is given, stop when it runs out and return a SearchResult instead.  If
+    moves is True, return the path as a MoveList.
+
     @type puzzle: Puzzle
-    @rtype: PuzzleNode
+    @type stats: SearchStats | None
+    @type budget: SearchBudget | None
+    @type moves: bool
+    @rtype: PuzzleNode | MoveList | SearchResult
 
-    Example not feasible due to the requirement of
-    instantiation of large amount of variables
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cat", "cot", "cog", "dog", "dot"}
+    >>> stats = SearchStats()
+    >>> path = breadth_first_solve(WordLadderPuzzle("cat", "dog", ws), stats)
+    >>> path.children[0].puzzle
+    WordLadderPuzzle(cot -> dog)
+    >>> stats.max_depth
+    2
+    >>> w = WordLadderPuzzle("cat", "dog", ws)
+    >>> ml = breadth_first_solve(w, moves=True)
+    >>> len(ml), ml[-1]
+    (3, WordLadderPuzzle(dog -> dog))
+    >>> from mn_puzzle import MNPuzzle
+    >>> stuck = MNPuzzle((("2", "1"), ("3", "*")), (("1", "2"), ("3", "*")))
+    >>> result = breadth_first_solve(stuck, budget=SearchBudget(max_seen=5))
+    >>> result.limit_hit, result.solution is None, result.best is not None
+    (True, True, True)
     """
+    key, solved, failed, extend = _probes(stats)
+    meter = None if budget is None else _Meter(budget, moves)
+
     a = PuzzleNode(puzzle)
 
     # a set of puzzles that has already been seen
     has_seen = set()
 
-    # a list to act as a queue
-    pending = deque([a])
+    # a queue of (node, depth) still to visit
+    pending = deque([(a, 0)])
 
     while len(pending) != 0:
 
         # keep track of visited nodes
-        visited = pending.popleft()
+        visited, depth = pending.popleft()
         # check if puzzle is solved
-        if visited.puzzle.is_solved():
-            return _one_path(visited)
+        if solved(visited.puzzle):
+            return _finish(_path(visited, moves), meter)
 
-        elif visited.puzzle.fail_fast():
-            return None
+        elif failed(visited.puzzle):
+            if stats is not None:
+                stats.pruned += 1
+            return _finish(None, meter)
 
         else:
+            config = key(visited.puzzle)
             # check if the puzzle configuration has already been seen
-            if str(visited.puzzle) not in has_seen:
-                has_seen.add(str(visited.puzzle))
+            if config not in has_seen:
+                has_seen.add(config)
+
+                if meter is not None:
+                    limit = meter.charge(visited, len(has_seen))
+                    if limit is not None:
+                        return meter.result(None, limit)
 
                 # set the puzzle_node's children into the puzzle's extensions
                 # with puzzle_node as the parent
                 children = [PuzzleNode(i, parent=visited) for i in
-                            visited.puzzle.extensions()]
+                            extend(visited.puzzle)]
                 visited.children = children
 
                 for i in children:
-                    pending.append(i)
+                    pending.append((i, depth + 1))
+
+                if stats is not None:
+                    stats.record_expansion(depth, len(pending),
+                                           len(children))
+            elif stats is not None:
+                stats.duplicates += 1
+    return _finish(None, meter)
+
+
+def iterative_deepening_solve(puzzle, max_depth=None, reorder=True,
+                              table_size=2 ** 16, stats=None, budget=None,
+                              moves=False):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, with each child containing an extension of the
+    puzzle in its parent.  Return None if this is not possible within
+    max_depth moves (unbounded if max_depth is None).
+
+    Runs depth-first searches bounded to 0, 1, 2, ... moves.  Each
+    iteration remembers the shallowest depth at which it met up to
+    table_size configurations and skips later meetings that are no
+    shallower; configurations met once the table is full are only checked
+    against the current path, so memory grows with table_size and the
+    depth, not with the number of configurations.  If reorder is True,
+    children are tried in decreasing order of how many bound-depth nodes
+    they led to in the previous iteration (recorded for up to table_size
+    configurations).
+
+    If stats is given, record the progress of the search in it.  If budget
+    is given, stop when it runs out and return a SearchResult instead.  If
+    moves is True, return the path as a MoveList.
+
+    @type puzzle: Puzzle
+    @type max_depth: int | None
+    @type reorder: bool
+    @type table_size: int
+    @type stats: SearchStats | None
+    @type budget: SearchBudget | None
+    @type moves: bool
+    @rtype: PuzzleNode | MoveList | SearchResult
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cat", "cot", "cog", "dog", "dot", "cut", "cud", "mud", "mug"}
+    >>> w = WordLadderPuzzle("cat", "dog", ws)
+    >>> path = iterative_deepening_solve(w)
+    >>> steps = 0
+    >>> while path.children:
+    ...     path, steps = path.children[0], steps + 1
+    >>> steps
+    3
+    >>> iterative_deepening_solve(w, max_depth=2) is None
+    True
+    >>> iterative_deepening_solve(WordLadderPuzzle("cat", "mop", ws)) is None
+    True
+    >>> len(iterative_deepening_solve(w, table_size=0, moves=True))
+    3
+    """
+    key, solved, failed, extend = _probes(stats)
+    meter = None if budget is None else _Meter(budget, moves)
+
+    # bound-depth nodes reached below each configuration last iteration
+    previous = {}
+    bound = 0
+    while max_depth is None or bound <= max_depth:
+        # shallowest depth each configuration was met at in this iteration,
+        # and the configurations on the path to the node being searched
+        shallowest, hits, on_path = {}, {}, set()
+        limit, waiting = None, 0
+
+        def _deepen(puzzle_node, config, depth):
+            """
+            Return the solved node found below puzzle_node, if any, and
+            how many nodes were cut off at the bound below it.
+
+            @type puzzle_node: PuzzleNode
+            @type config: Any
+            @type depth: int
+            @rtype: tuple[PuzzleNode | None, int]
+            """
+            nonlocal limit, waiting
+            waiting -= 1
+            if config in on_path or shallowest.get(config, depth + 1) <= depth:
+                if stats is not None:
+                    stats.duplicates += 1
+                return None, 0
+            if config in shallowest or len(shallowest) < table_size:
+                shallowest[config] = depth
+
+            if solved(puzzle_node.puzzle):
+                return puzzle_node, 0
+            elif depth == bound:
+                return None, 1
+
+            if meter is not None:
+                limit = meter.charge(puzzle_node, len(shallowest))
+                if limit is not None:
+                    return None, 0
+
+            if failed(puzzle_node.puzzle):
+                if stats is not None:
+                    stats.pruned += 1
+                return None, 0
+
+            children = [(key(i), PuzzleNode(i, parent=puzzle_node)) for i in
+                        extend(puzzle_node.puzzle)]
+            if reorder and previous:
+                children.sort(key=lambda c: -previous.get(c[0], 0))
+            waiting += len(children)
+            if stats is not None:
+                stats.record_expansion(depth, waiting, len(children))
+
+            cut = 0
+            on_path.add(config)
+            for child_config, child in children:
+                found, child_cut = _deepen(child, child_config, depth + 1)
+                if found is not None or limit is not None:
+                    return found, 0
+                cut += child_cut
+            on_path.discard(config)
+            if reorder and (config in hits or len(hits) < table_size):
+                hits[config] = cut
+            return None, cut
+
+        root = PuzzleNode(puzzle)
+        waiting = 1
+        solution, cut = _deepen(root, key(puzzle), 0)
+        if solution is not None:
+            return _finish(_path(solution, moves), meter)
+        elif limit is not None:
+            return meter.result(None, limit)
+        elif cut == 0:
+            # nothing was cut off at the bound, so deeper searches
+            # cannot reach anything new
+            break
+        previous, bound = hits, bound + 1
+    return _finish(None, meter)
+
+
+def weighted_astar_solve(puzzle, weight=1.0, stats=None, budget=None,
+                         moves=False):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child containing an extension of the puzzle
+    in its parent.  Return None if this is not possible.
+
+    Expands configurations in order of moves so far plus weight times
+    heuristic().  With weight 1 and a heuristic that never overestimates,
+    the path is a shortest one; a larger weight finds a path at most weight
+    times longer than the shortest, usually expanding far fewer nodes.
+
+    If stats is given, record the progress of the search in it.  If budget
+    is given, stop when it runs out and return a SearchResult instead.  If
+    moves is True, return the path as a MoveList.
+
+    @type puzzle: Puzzle
+    @type weight: float
+    @type stats: SearchStats | None
+    @type budget: SearchBudget | None
+    @type moves: bool
+    @rtype: PuzzleNode | MoveList | SearchResult
+
+    >>> from mn_puzzle import MNPuzzle
+    >>> target = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start = (("*", "2", "3"), ("1", "4", "5"))
+    >>> len(weighted_astar_solve(MNPuzzle(start, target), moves=True))
+    3
+    """
+    return _best_first(puzzle, 1, weight, stats, budget, moves)
+
+
+def greedy_best_first_solve(puzzle, stats=None, budget=None, moves=False):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child containing an extension of the puzzle
+    in its parent.  Return None if this is not possible.
+
+    Always expands the configuration with the smallest heuristic() next,
+    ignoring how many moves it took to reach, so the path found may be long.
+
+    If stats is given, record the progress of the search in it.  If budget
+    is given, stop when it runs out and return a SearchResult instead.  If
+    moves is True, return the path as a MoveList.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type budget: SearchBudget | None
+    @type moves: bool
+    @rtype: PuzzleNode | MoveList | SearchResult
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cat", "cot", "cog", "dog", "cut", "cud", "mud"}
+    >>> greedy_best_first_solve(WordLadderPuzzle("cat", "dog", ws),
+    ...                         moves=True).moves
+    ['cot', 'cog', 'dog']
+    """
+    return _best_first(puzzle, 0, 1, stats, budget, moves)
+
+
+def _best_first(puzzle, g_weight, h_weight, stats, budget, moves):
+    """
+    Return the path found by expanding configurations in order of g_weight
+    times moves so far plus h_weight times heuristic(), as the solvers
+    report it.
+
+    @type puzzle: Puzzle
+    @type g_weight: float
+    @type h_weight: float
+    @type stats: SearchStats | None
+    @type budget: SearchBudget | None
+    @type moves: bool
+    @rtype: PuzzleNode | MoveList | SearchResult
+    """
+    key, solved, failed, extend = _probes(stats)
+    meter = None if budget is None else _Meter(budget, moves)
+
+    # fewest moves each configuration has been expanded at
+    closed = {}
+    # open list of (priority, heuristic, order, moves so far, node); order
+    # breaks ties first come, first served
+    h = puzzle.heuristic()
+    pending = [(h_weight * h, h, 0, 0, PuzzleNode(puzzle))]
+    order = 1
+
+    while pending:
+        _, _, _, depth, visited = heappop(pending)
+        if solved(visited.puzzle):
+            return _finish(_path(visited, moves), meter)
+
+        config = key(visited.puzzle)
+        if closed.get(config, depth + 1) <= depth:
+            if stats is not None:
+                stats.duplicates += 1
+            continue
+        closed[config] = depth
+
+        if meter is not None:
+            limit = meter.charge(visited, len(closed))
+            if limit is not None:
+                return meter.result(None, limit)
+
+        if failed(visited.puzzle):
+            if stats is not None:
+                stats.pruned += 1
+            continue
+
+        children = extend(visited.puzzle)
+        for i in children:
+            h = i.heuristic()
+            heappush(pending, (g_weight * (depth + 1) + h_weight * h, h,
+                               order, depth + 1,
+                               PuzzleNode(i, parent=visited)))
+            order += 1
+
+        if stats is not None:
+            stats.record_expansion(depth, len(pending), len(children))
+    return _finish(None, meter)
+
+
+def beam_search_solve(puzzle, width=100, score=None, max_depth=None,
+                      stats=None, budget=None, moves=False):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child containing an extension of the puzzle
+    in its parent.  Return None if none is found.
+
+    Searches breadth-first, but keeps only the width best configurations of
+    each layer according to score (each puzzle's own score() by default),
+    so memory stays proportional to width times depth.  Configurations are
+    told apart by key() and never kept twice, within or across layers.
+    Gives up after max_depth layers if max_depth is given.  The search may
+    miss solutions that a complete search would find.
+
+    If stats is given, record the progress of the search in it.  If budget
+    is given, stop when it runs out and return a SearchResult instead.  If
+    moves is True, return the path as a MoveList.
+
+    @type puzzle: Puzzle
+    @type width: int
+    @type score: (Puzzle) -> int | float | None
+    @type max_depth: int | None
+    @type stats: SearchStats | None
+    @type budget: SearchBudget | None
+    @type moves: bool
+    @rtype: PuzzleNode | MoveList | SearchResult
+
+    >>> from mn_puzzle import MNPuzzle
+    >>> target = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start = (("*", "2", "3"), ("1", "4", "5"))
+    >>> beam_search_solve(MNPuzzle(start, target), width=2, moves=True).moves
+    ['down', 'right', 'right']
+    """
+    key, solved, failed, extend = _probes(stats)
+    score = _score if score is None else score
+    meter = None if budget is None else _Meter(budget, moves)
+
+    root = PuzzleNode(puzzle)
+    if solved(puzzle):
+        return _finish(_path(root, moves), meter)
+    layer, seen, depth, order = [root], {key(puzzle)}, 0, 0
+
+    while layer and (max_depth is None or depth < max_depth):
+        # candidates for the next layer, by key: (score, order, node)
+        candidates = {}
+        for visited in layer:
+            if meter is not None:
+                limit = meter.charge(visited, len(seen) + len(candidates))
+                if limit is not None:
+                    return meter.result(None, limit)
+            children = extend(visited.puzzle)
+            if stats is not None:
+                stats.record_expansion(depth, len(layer) + len(candidates),
+                                       len(children))
+            for i in children:
+                config = key(i)
+                if config in seen or config in candidates:
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
+                child = PuzzleNode(i, parent=visited)
+                if solved(i):
+                    return _finish(_path(child, moves), meter)
+                elif failed(i):
+                    if stats is not None:
+                        stats.pruned += 1
+                    continue
+                candidates[config] = (score(i), order, child)
+                order += 1
+        best = nsmallest(width, candidates.items(), key=lambda c: c[1][:2])
+        seen.update([config for config, _ in best])
+        layer = [entry[2] for _, entry in best]
+        depth += 1
+    return _finish(None, meter)
+
+
+def enumerate_solutions(puzzle, limit=None, max_depth=None, stats=None,
+                        moves=False):
+    """
+    Generate the paths from PuzzleNode(puzzle) to PuzzleNodes containing
+    solutions, each as a fresh chain of PuzzleNodes from the root, or as a
+    MoveList if moves is True.  A path never repeats a configuration, and
+    is not extended past a solution.
+
+    Stop after limit solutions, and leave out paths of more than max_depth
+    moves, if these are given.  If stats is given, record the progress of
+    the search in it.
+
+    @type puzzle: Puzzle
+    @type limit: int | None
+    @type max_depth: int | None
+    @type stats: SearchStats | None
+    @type moves: bool
+    @rtype: Iterator[PuzzleNode | MoveList]
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cat", "cot", "cog", "dog", "dot", "hat", "hot"}
+    >>> w = WordLadderPuzzle("cat", "dog", ws)
+    >>> ladders = [m.moves for m in enumerate_solutions(w, moves=True)]
+    >>> len(ladders), min([len(m) for m in ladders])
+    (7, 3)
+    >>> sorted([m.moves for m in enumerate_solutions(w, max_depth=3,
+    ...                                              moves=True)])
+    [['cot', 'cog', 'dog'], ['cot', 'dot', 'dog']]
+    >>> len(list(enumerate_solutions(w, limit=2)))
+    2
+    """
+    key, solved, failed, extend = _probes(stats)
+    found = 0
+
+    # configurations on the path to the current node, which the path may
+    # not return to
+    on_path = set()
+
+    # (node, config, depth, extensions not yet tried) for each node on
+    # the path to the current node
+    stack = []
+    p_node, depth = PuzzleNode(puzzle), 0
+    while p_node is not None:
+        config = key(p_node.puzzle)
+        if config in on_path:
+            if stats is not None:
+                stats.duplicates += 1
+        elif solved(p_node.puzzle):
+            yield _path(_copy_path(p_node), moves)
+            found += 1
+            if limit is not None and found >= limit:
+                return
+        elif max_depth is not None and depth >= max_depth:
+            pass
+        elif failed(p_node.puzzle):
+            if stats is not None:
+                stats.pruned += 1
+        else:
+            extensions = extend(p_node.puzzle)
+            on_path.add(config)
+            stack.append((p_node, config, depth, iter(extensions)))
+            if stats is not None:
+                stats.record_expansion(depth, len(stack), len(extensions))
+
+        # move on to the next untried extension of the deepest node that
+        # has one
+        p_node = None
+        while stack and p_node is None:
+            parent, parent_config, parent_depth, rest = stack[-1]
+            child = next(rest, None)
+            if child is None:
+                stack.pop()
+                on_path.discard(parent_config)
+            else:
+                p_node = PuzzleNode(child, parent=parent)
+                depth = parent_depth + 1
+
+
+def count_solutions(puzzle, max_depth=None, stats=None):
+    """
+    Return the number of paths from puzzle to a solution, counted as
+    enumerate_solutions would generate them.
+
+    The count below each configuration is remembered, so a configuration
+    reached along many paths is searched only once.  This is only sound
+    where no path can return to a configuration, as in peg solitaire or
+    sudoku; ValueError is raised if one does.
+
+    @type puzzle: Puzzle
+    @type max_depth: int | None
+    @type stats: SearchStats | None
+    @rtype: int
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> s = SudokuPuzzle(4, ["*", "*", "*", "*", "C", "D", "A", "B",
+    ...                      "*", "*", "*", "*", "D", "C", "B", "A"],
+    ...                  {"A", "B", "C", "D"})
+    >>> count_solutions(s), len(list(enumerate_solutions(s)))
+    (4, 4)
+    >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+    >>> grid = [["*", "*", "*", "*", "*"],
+    ...         ["*", "*", "*", "*", "*"],
+    ...         ["*", "*", ".", "*", "*"]]
+    >>> gpsp = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+    >>> count_solutions(gpsp)
+    17424
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> count_solutions(WordLadderPuzzle("cat", "dog", {"cat", "cot", "dog"}))
+    Traceback (most recent call last):
+    ...
+    ValueError: configuration cat recurs on a path; count with \
+enumerate_solutions instead
+    """
+    key, solved, failed, extend = _probes(stats)
+
+    # solution counts below configurations already counted, by
+    # configuration, or by (configuration, depth) if max_depth matters
+    counted = {}
+    in_progress = set()
+
+    # [config, memo key, depth, extensions not yet counted, count so far]
+    # for each configuration on the path being counted
+    stack = []
+
+    def _start(p, depth):
+        """
+        Return the number of paths from p to a solution at most
+        max_depth - depth moves away if it is known without looking at
+        p's extensions, else push p's entry onto stack and return None.
+
+        @type p: Puzzle
+        @type depth: int
+        @rtype: int | None
+        """
+        config = key(p)
+        memo_key = config if max_depth is None else (config, depth)
+        if memo_key in counted:
+            if stats is not None:
+                stats.duplicates += 1
+            return counted[memo_key]
+        elif config in in_progress:
+            raise ValueError("configuration {} recurs on a path; count with "
+                             "enumerate_solutions instead".format(config))
+
+        if solved(p):
+            total = 1
+        elif max_depth is not None and depth >= max_depth:
+            total = 0
+        elif failed(p):
+            if stats is not None:
+                stats.pruned += 1
+            total = 0
+        else:
+            extensions = extend(p)
+            if stats is not None:
+                stats.record_expansion(depth, len(in_progress),
+                                       len(extensions))
+            in_progress.add(config)
+            stack.append([config, memo_key, depth, iter(extensions), 0])
+            return None
+        counted[memo_key] = total
+        return total
+
+    total = _start(puzzle, 0)
+    while stack:
+        entry = stack[-1]
+        # add in the count of the child just finished, if any
+        if total is not None:
+            entry[4] += total
+        child = next(entry[3], None)
+        if child is None:
+            stack.pop()
+            in_progress.discard(entry[0])
+            counted[entry[1]] = total = entry[4]
+        else:
+            total = _start(child, entry[2] + 1)
+    return total
+
+
+def _path(p_node, moves):
+    """
+    Return the path from the root to p_node as the solvers report it: as a
+    MoveList if moves is True, else as a chain of PuzzleNodes from the root.
+
+    @type p_node: PuzzleNode
+    @type moves: bool
+    @rtype: PuzzleNode | MoveList
+    """
+    return MoveList.from_node(p_node) if moves else _one_path(p_node)
+
+
+def _copy_path(p_node):
+    """
+    Return a copy of the path from the root to p_node, following parents
+    only, that shares no PuzzleNodes with p_node's tree.
+
+    @type p_node: PuzzleNode
+    @rtype: PuzzleNode
+    """
+    puzzles = []
+    while p_node is not None:
+        puzzles.append(p_node.puzzle)
+        p_node = p_node.parent
+    copy = None
+    for p in reversed(puzzles):
+        copy = PuzzleNode(p, parent=copy)
+    return copy
 
 
 def _one_path(p_node):
@@ -126,16 +1053,225 @@ def _one_path(p_node):
     @rtype: PuzzleNode
     """
 
-    if not p_node.parent:
-        return p_node
-    else:
-
-        # makes the parent of p_node have p_node as its only child
+    # walk up to the root, making the parent of each node on the way have
+    # that node as its only child
+    while p_node.parent:
         p_node.parent.children = [p_node]
+        p_node = p_node.parent
+    return p_node
+
 
-        # recursively call one_path on the parent of p_node until we reach
-        # the root
-        return _one_path(p_node.parent)
+class HistoryHeuristic:
+    """
+    A move ordering for depth_first_solve that learns as the search goes.
+
+    Each move (see Puzzle.move_to) is scored by where it has led: reaching
+    a puzzle that is expanded at depth d adds d, reaching a dead end
+    subtracts the depth it happened at.  Extensions are tried in order of
+    decreasing score of the move reaching them, after ordering by base if
+    it is given; ties keep base's order.
+    """
+
+    def __init__(self, base=None):
+        """
+        Create a new HistoryHeuristic self refining move ordering base.
+
+        @type self: HistoryHeuristic
+        @type base: (Puzzle, list[Puzzle]) -> list[Puzzle] | None
+        @rtype: None
+        """
+        self.base, self.table = base, {}
+
+    def __call__(self, puzzle, extensions):
+        """
+        Return extensions of puzzle, best-scored move first.
+
+        @type self: HistoryHeuristic
+        @type puzzle: Puzzle
+        @type extensions: list[Puzzle]
+        @rtype: list[Puzzle]
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> ws = {"cat", "cot", "cut", "dog"}
+        >>> w = WordLadderPuzzle("cat", "dog", ws)
+        >>> h = HistoryHeuristic()
+        >>> h.learn(w, WordLadderPuzzle("cut", "dog", ws), 1, True)
+        >>> h(w, sorted(w.extensions(), key=str))
+        [WordLadderPuzzle(cut -> dog), WordLadderPuzzle(cot -> dog)]
+        """
+        if self.base is not None:
+            extensions = self.base(puzzle, extensions)
+        table = self.table
+        return sorted(extensions,
+                      key=lambda e: -table.get(puzzle.move_to(e), 0))
+
+    def learn(self, parent, puzzle, depth, expanded):
+        """
+        Score the move from parent to puzzle, reached at depth, by whether
+        puzzle was expanded or was a dead end.
+
+        @type self: HistoryHeuristic
+        @type parent: Puzzle
+        @type puzzle: Puzzle
+        @type depth: int
+        @type expanded: bool
+        @rtype: None
+        """
+        move = parent.move_to(puzzle)
+        self.table[move] = (self.table.get(move, 0) +
+                            (depth if expanded else -depth))
+
+
+class MoveList:
+    """
+    A solution path stored as its starting puzzle and the list of moves
+    (see Puzzle.move_to) along it.  The puzzles along the path are rebuilt
+    with Puzzle.apply_move only when asked for.
+    """
+
+    def __init__(self, start, moves):
+        """
+        Create a new MoveList self from puzzle start through moves.
+
+        @type self: MoveList
+        @type start: Puzzle
+        @type moves: list
+        @rtype: None
+        """
+        self.start, self.moves = start, moves
+        # the last puzzle rebuilt and how many moves it is from start
+        self._at, self._puzzle = 0, start
+
+    @staticmethod
+    def from_node(p_node):
+        """
+        Return the MoveList from the root of p_node's tree to p_node,
+        following parents only.
+
+        @type p_node: PuzzleNode
+        @rtype: MoveList
+        """
+        moves = []
+        while p_node.parent is not None:
+            moves.append(p_node.parent.puzzle.move_to(p_node.puzzle))
+            p_node = p_node.parent
+        moves.reverse()
+        return MoveList(p_node.puzzle, moves)
+
+    def __len__(self):
+        """
+        Return the number of moves in MoveList self.
+
+        @type self: MoveList
+        @rtype: int
+
+        >>> len(MoveList(None, ["a", "b"]))
+        2
+        """
+        return len(self.moves)
+
+    def __eq__(self, other):
+        """
+        Return whether MoveList self is equivalent to other.
+
+        @type self: MoveList
+        @type other: MoveList | Any
+        @rtype: bool
+
+        >>> MoveList(1, ["a"]) == MoveList(1, ["a"])
+        True
+        """
+        return (type(self) == type(other) and self.start == other.start and
+                self.moves == other.moves)
+
+    def __repr__(self):
+        """
+        Represent MoveList self as a string.
+
+        @type self: MoveList
+        @rtype: str
+
+        >>> MoveList(1, ["a"])
+        MoveList(1, ['a'])
+        """
+        return "MoveList({!r}, {!r})".format(self.start, self.moves)
+
+    def __getitem__(self, i):
+        """
+        Return the puzzle reached after the first i moves of MoveList self.
+        Puzzles are replayed from the last one asked for when i is no
+        smaller, so stepping through in order costs one move per step.
+
+        @type self: MoveList
+        @type i: int
+        @rtype: Puzzle
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> ws = {"cat", "cot", "cog", "dog"}
+        >>> ml = MoveList(WordLadderPuzzle("cat", "dog", ws), ["cot", "cog"])
+        >>> ml[2], ml[0]
+        (WordLadderPuzzle(cog -> dog), WordLadderPuzzle(cat -> dog))
+        """
+        if i < 0:
+            i += len(self.moves) + 1
+        if not 0 <= i <= len(self.moves):
+            raise IndexError("MoveList index out of range")
+        if i < self._at:
+            self._at, self._puzzle = 0, self.start
+        while self._at < i:
+            self._puzzle = self._puzzle.apply_move(self.moves[self._at])
+            self._at += 1
+        return self._puzzle
+
+    def __iter__(self):
+        """
+        Yield the puzzles along MoveList self, starting puzzle first.
+
+        @type self: MoveList
+        @rtype: Iterator[Puzzle]
+        """
+        puzzle = self.start
+        yield puzzle
+        for move in self.moves:
+            puzzle = puzzle.apply_move(move)
+            yield puzzle
+
+    def to_path(self):
+        """
+        Return MoveList self as a chain of PuzzleNodes, as the solvers
+        return without moves.
+
+        @type self: MoveList
+        @rtype: PuzzleNode
+        """
+        root = node = None
+        for puzzle in self:
+            child = PuzzleNode(puzzle, parent=node)
+            if node is None:
+                root = child
+            else:
+                node.children = [child]
+            node = child
+        return root
+
+
+def _covers(nodes, others):
+    """
+    Return whether each PuzzleNode of others is equal to some PuzzleNode of
+    nodes, comparing only nodes whose puzzles hash alike.
+
+    @type nodes: list[PuzzleNode]
+    @type others: list[PuzzleNode]
+    @rtype: bool
+    """
+    if not others:
+        return True
+    by_hash = {}
+    for node in nodes:
+        by_hash.setdefault(hash(node.puzzle), []).append(node)
+    return all([any([other == node
+                     for node in by_hash.get(hash(other.puzzle), [])])
+                for other in others])
 
 
 # Class PuzzleNode helps build trees of PuzzleNodes that have
@@ -179,17 +1315,55 @@ class PuzzleNode:
         True
         >>> pn1 == pn3
         False
+        >>> pn1.children = [PuzzleNode(pn3.puzzle), PuzzleNode(pn2.puzzle)]
+        >>> pn2.children = [PuzzleNode(pn2.puzzle), PuzzleNode(pn3.puzzle)]
+        >>> pn1 == pn2
+        True
         """
         return (type(self) == type(other) and
                 self.puzzle == other.puzzle and
-                all([x in self.children for x in other.children]) and
-                all([x in other.children for x in self.children]))
+                _covers(self.children, other.children) and
+                _covers(other.children, self.children))
 
     def __str__(self):
         """
         Return a human-readable string representing PuzzleNode self.
 
-        # doctest not feasible.
+        Each puzzle is followed by a blank line and then its children,
+        separated by newlines.  The tree is walked with an explicit stack,
+        so long solution paths need no deep recursion.
+
+        @type self: PuzzleNode
+        @rtype: str
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> ws = {"cat", "cot"}
+        >>> pn = PuzzleNode(WordLadderPuzzle("cat", "cot", ws))
+        >>> pn.children = [PuzzleNode(WordLadderPuzzle("cot", "cot", ws))]
+        >>> str(pn).split("\\n")
+        ['cat -> cot', '', 'cot -> cot', '', '']
         """
-        return "{}\n\n{}".format(self.puzzle,
-                                 "\n".join([str(x) for x in self.children]))
+        pieces, pending = [], [self]
+        while pending:
+            item = pending.pop()
+            if isinstance(item, str):
+                pieces.append(item)
+            else:
+                pieces.append("{}\n\n".format(item.puzzle))
+                # push children last-first, with newlines between them
+                for i in range(len(item.children) - 1, -1, -1):
+                    pending.append(item.children[i])
+                    if i > 0:
+                        pending.append("\n")
+        return "".join(pieces)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ["profile"]:
+        import puzzle_profile
+        puzzle_profile.main(sys.argv[2:])
+    else:
+        import doctest
+        doctest.testmod()
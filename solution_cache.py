@@ -0,0 +1,424 @@
+"""
+A cache of solver results, keyed by the configuration and goal of a puzzle
+together with the name of the solver that solved it.
+"""
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import sha1
+import json
+import sqlite3
+from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+from mn_puzzle import MNPuzzle
+from peg_board import PegBoard, PegSolitairePuzzle
+from puzzle_codec import encode_board
+from puzzle_tools import MoveList, PuzzleNode, SearchResult, \
+    breadth_first_solve, iterative_deepening_solve
+from sudoku_puzzle import SudokuPuzzle
+from word_ladder_puzzle import WordLadderPuzzle
+
+# solvers whose solutions are shortest paths; every suffix of a shortest
+# path is a shortest path from its first configuration, so it may be
+# handed out for later queries starting there
+_OPTIMAL = {breadth_first_solve, iterative_deepening_solve}
+
+
+class SolutionCache:
+    """
+    Solutions to puzzles, kept in a least-recently-used in-memory tier and,
+    optionally, in an SQLite file on disk.
+
+    Each path is stored as the list of configurations along it, so a cached
+    solution is rebuilt into PuzzleNodes sharing the context (goal, word
+    set, symbol set) of the puzzle being asked about, together with the
+    form the solver returned it in ("node", "moves" or "result").
+    """
+
+    def __init__(self, path=None, memory_entries=1024, disk_bytes=2 ** 26):
+        """
+        Create a new SolutionCache self holding at most memory_entries
+        configurations in memory and, if path is given, at most about
+        disk_bytes of solutions in the SQLite file at path.
+
+        @type self: SolutionCache
+        @type path: str | None
+        @type memory_entries: int
+        @type disk_bytes: int
+        @rtype: None
+        """
+        self._memory, self._memory_entries = OrderedDict(), memory_entries
+        self._disk_bytes, self._disk_size, self._clock = disk_bytes, 0, 0
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS solutions "
+                             "(key TEXT PRIMARY KEY, data TEXT, "
+                             "size INTEGER, used INTEGER)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS steps "
+                             "(key TEXT PRIMARY KEY, solution TEXT, "
+                             "step INTEGER)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS steps_solution "
+                             "ON steps (solution)")
+            self._disk_size, self._clock = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(used), 0) "
+                "FROM solutions").fetchone()
+        self.hits, self.misses = 0, 0
+
+    def close(self):
+        """
+        Write SolutionCache self's disk tier out and close it.
+
+        @type self: SolutionCache
+        @rtype: None
+        """
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
+
+    def solve(self, puzzle, solver=breadth_first_solve, name=None):
+        """
+        Return solver(puzzle), from the cache if this puzzle has been
+        solved by the solver called name (solver's own name if None)
+        before.  A cached answer is returned in the form the solver gave
+        it: a chain of PuzzleNodes, a MoveList, or a SearchResult with no
+        limit hit.
+
+        If solver finds shortest paths, a puzzle whose configuration lies
+        on a cached path to the same goal is answered with the rest of
+        that path.  A SearchResult whose budget ran out is not cached.
+
+        @type self: SolutionCache
+        @type puzzle: Puzzle
+        @type solver: (Puzzle) -> PuzzleNode | MoveList | SearchResult | None
+        @type name: str | None
+        @rtype: PuzzleNode | MoveList | SearchResult | None
+
+        >>> ws = {"cat", "cot", "cog", "dog"}
+        >>> cache = SolutionCache()
+        >>> path = cache.solve(WordLadderPuzzle("cat", "dog", ws))
+        >>> path = cache.solve(WordLadderPuzzle("cot", "dog", ws))
+        >>> path.puzzle, path.children[0].puzzle
+        (WordLadderPuzzle(cot -> dog), WordLadderPuzzle(cog -> dog))
+        >>> cache.hits, cache.misses
+        (1, 1)
+        >>> cache.solve(WordLadderPuzzle("cat", "dog", ws), lambda p: None)
+        Traceback (most recent call last):
+        ...
+        ValueError: solvers without a name of their own need name= to be cached
+        >>> from functools import partial
+        >>> solver = partial(breadth_first_solve, moves=True)
+        >>> for _ in range(2):
+        ...     path = cache.solve(WordLadderPuzzle("cat", "dog", ws), solver,
+        ...                        name="bfs-moves")
+        ...     print(type(path).__name__, len(path), path.moves)
+        MoveList 3 ['cot', 'cog', 'dog']
+        MoveList 3 ['cot', 'cog', 'dog']
+        """
+        if name is None:
+            # lambdas all share one name and partials have none
+            name = getattr(solver, "__name__", "<lambda>")
+            if name == "<lambda>":
+                raise ValueError("solvers without a name of their own "
+                                 "need name= to be cached")
+        key = "{}\n{}".format(name, canonical_key(puzzle))
+        found = self._lookup(key)
+        if found is not None:
+            self.hits += 1
+            states, step, form = found
+            path = None if states is None else _rebuild(puzzle,
+                                                        states[step:])
+            return _reform(path, form)
+        self.misses += 1
+        solution = solver(puzzle)
+        path, form = solution, "node"
+        if isinstance(solution, SearchResult):
+            if solution.limit_hit:
+                return solution
+            path, form = solution.solution, "result"
+        if isinstance(path, MoveList):
+            form = "moves"
+        puzzles = None if path is None else _puzzles(path)
+        self._store(key, puzzles, form, solver in _OPTIMAL)
+        return solution
+
+    def _lookup(self, key):
+        """
+        Return the (states, step, form) cached under key, or None if there
+        is none.
+
+        @type self: SolutionCache
+        @type key: str
+        @rtype: tuple[list | None, int, str] | None
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        elif self._db is None:
+            return None
+        row = self._db.execute("SELECT solution, step FROM steps "
+                               "WHERE key = ?", (key,)).fetchone()
+        solution, step = row if row is not None else (key, 0)
+        row = self._db.execute("SELECT data FROM solutions WHERE key = ?",
+                               (solution,)).fetchone()
+        if row is None:
+            return None
+        self._clock += 1
+        self._db.execute("UPDATE solutions SET used = ? WHERE key = ?",
+                         (self._clock, solution))
+        form, states = json.loads(row[0])
+        found = (states, step, form)
+        self._remember(key, found)
+        return found
+
+    def _remember(self, key, found):
+        """
+        Put found into the in-memory tier under key, evicting the least
+        recently used entries beyond memory_entries.
+
+        @type self: SolutionCache
+        @type key: str
+        @type found: tuple[list | None, int, str]
+        @rtype: None
+        """
+        self._memory[key] = found
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._memory_entries:
+            self._memory.popitem(last=False)
+
+    def _store(self, key, puzzles, form, suffixes):
+        """
+        Cache the configurations of puzzles, the puzzles along a solution
+        (None if there is none) the solver returned in form, under key, and
+        under the key of each later configuration if suffixes is True.
+
+        @type self: SolutionCache
+        @type key: str
+        @type puzzles: list[Puzzle] | None
+        @type form: str
+        @type suffixes: bool
+        @rtype: None
+        """
+        solver = key.split("\n", 1)[0]
+        states = None if puzzles is None else [_state(p) for p in puzzles]
+        step_keys = []
+        if suffixes and puzzles is not None:
+            step_keys = ["{}\n{}".format(solver, canonical_key(p))
+                         for p in puzzles[1:]]
+        self._remember(key, (states, 0, form))
+        for step, step_key in enumerate(step_keys, 1):
+            self._remember(step_key, (states, step, form))
+
+        if self._db is not None:
+            data = json.dumps([form, states])
+            size = len(data) + sum([len(k) for k in step_keys])
+            self._clock += 1
+            self._drop(key)
+            self._db.execute("INSERT INTO solutions VALUES (?, ?, ?, ?)",
+                             (key, data, size, self._clock))
+            self._db.executemany("INSERT OR REPLACE INTO steps VALUES "
+                                 "(?, ?, ?)",
+                                 [(k, key, step) for step, k in
+                                  enumerate(step_keys, 1)])
+            self._disk_size += size
+            while self._disk_size > self._disk_bytes:
+                row = self._db.execute("SELECT key FROM solutions ORDER BY "
+                                       "used LIMIT 1").fetchone()
+                if row is None or row[0] == key:
+                    break
+                self._drop(row[0])
+            self._db.commit()
+
+    def _drop(self, key):
+        """
+        Remove the solution stored under key from the disk tier.
+
+        @type self: SolutionCache
+        @type key: str
+        @rtype: None
+        """
+        row = self._db.execute("SELECT size FROM solutions WHERE key = ?",
+                               (key,)).fetchone()
+        if row is not None:
+            self._disk_size -= row[0]
+            self._db.execute("DELETE FROM solutions WHERE key = ?", (key,))
+            self._db.execute("DELETE FROM steps WHERE solution = ?", (key,))
+
+
+@lru_cache(maxsize=16)
+def _fingerprint(ws):
+    """
+    Return a short string identifying the words in word set ws.
+
+    @type ws: frozenset[str]
+    @rtype: str
+
+    >>> _fingerprint(frozenset("ab")) == _fingerprint(frozenset("ba"))
+    True
+    """
+    digest = sha1("\n".join(sorted(ws)).encode()).hexdigest()[:16]
+    return "{}:{}".format(len(ws), digest)
+
+
+def canonical_key(puzzle):
+    """
+    Return a string that identifies puzzle's configuration and goal, equal
+    for two puzzles exactly when they are the same problem.
+
+    @type puzzle: Puzzle
+    @rtype: str
+
+    >>> canonical_key(MNPuzzle((("1", "*"),), (("*", "1"),)))
+    'MNPuzzle 1,*/*,1'
+    >>> w = WordLadderPuzzle("cat", "dog", {"cat", "cot"})
+    >>> canonical_key(w)
+    'WordLadderPuzzle cat>dog 2:cfdc3f9b38f1d718'
+    >>> canonical_key(WordLadderPuzzle("cat", "dog", w._word_set, mode="edit"))
+    'WordLadderPuzzle cat>dog 2:cfdc3f9b38f1d718 edit'
+    >>> a, b = PegBoard.triangle(3), PegBoard.triangle(3)
+    >>> (canonical_key(PegSolitairePuzzle(a, a.holes[1:])) ==
+    ...  canonical_key(PegSolitairePuzzle(b, b.holes[1:])))
+    True
+    """
+    if isinstance(puzzle, MNPuzzle):
+        state = "/".join(["|".join([",".join(row) for row in grid])
+                          for grid in (puzzle.from_grid, puzzle.to_grid)])
+    elif isinstance(puzzle, WordLadderPuzzle):
+        state = "{}>{} {}".format(puzzle._from_word, puzzle._to_word,
+                                  _fingerprint(frozenset(puzzle._word_set)))
+        if puzzle._mode != "substitute":
+            state += " " + puzzle._mode
+    elif isinstance(puzzle, SudokuPuzzle):
+        state = "{} {} {}".format(puzzle._n, ",".join(puzzle._symbols),
+                                  ",".join(sorted(puzzle._symbol_set)))
+    elif isinstance(puzzle, GridPegSolitairePuzzle):
+        state = "|".join(["".join(row) for row in puzzle._marker])
+    elif isinstance(puzzle, PegSolitairePuzzle):
+        # any other board is named by a digest of its packed form
+        digest = sha1(encode_board(puzzle._board)).hexdigest()[:16]
+        state = "{} {:x}".format(digest, puzzle._pegs)
+    else:
+        raise TypeError("no canonical key for {}".format(type(puzzle)))
+    return "{} {}".format(type(puzzle).__name__, state)
+
+
+def _puzzles(path):
+    """
+    Return the puzzles along path, a MoveList or a chain of PuzzleNodes
+    each with at most one child.
+
+    @type path: PuzzleNode | MoveList
+    @rtype: list[Puzzle]
+    """
+    if isinstance(path, MoveList):
+        return list(path)
+    puzzles, node = [], path
+    while node is not None:
+        puzzles.append(node.puzzle)
+        node = node.children[0] if node.children else None
+    return puzzles
+
+
+def _state(puzzle):
+    """
+    Return the part of puzzle that changes from step to step of a
+    solution, in a form JSON can store.
+
+    @type puzzle: Puzzle
+    @rtype: Any
+    """
+    if isinstance(puzzle, MNPuzzle):
+        return [list(row) for row in puzzle.from_grid]
+    elif isinstance(puzzle, WordLadderPuzzle):
+        return puzzle._from_word
+    elif isinstance(puzzle, SudokuPuzzle):
+        return puzzle._symbols
+    elif isinstance(puzzle, GridPegSolitairePuzzle):
+        return puzzle._marker
+    return puzzle._pegs
+
+
+def _rebuild(template, states):
+    """
+    Return a path of PuzzleNodes through states, sharing the goal and
+    context of template.
+
+    @type template: Puzzle
+    @type states: list
+    @rtype: PuzzleNode
+
+    >>> t = MNPuzzle((("1", "*"),), (("*", "1"),))
+    >>> print(_rebuild(t, [[["1", "*"]], [["*", "1"]]]).children[0].puzzle)
+    ---------
+     *  1
+    ---------
+    """
+    root = node = None
+    for state in states:
+        if isinstance(template, MNPuzzle):
+            puzzle = MNPuzzle(tuple([tuple(row) for row in state]),
+                              template.to_grid)
+        elif isinstance(template, WordLadderPuzzle):
+            puzzle = WordLadderPuzzle(state, template._to_word,
+                                      template._word_set, template._mode)
+        elif isinstance(template, SudokuPuzzle):
+            puzzle = SudokuPuzzle(template._n, state, template._symbol_set)
+        elif isinstance(template, GridPegSolitairePuzzle):
+            puzzle = GridPegSolitairePuzzle(state, template._marker_set)
+        else:
+            puzzle = template._with(state)
+        child = PuzzleNode(puzzle, parent=node)
+        if node is None:
+            root = child
+        else:
+            node.children = [child]
+        node = child
+    return root
+
+
+def _reform(path, form):
+    """
+    Return path, a chain of PuzzleNodes or None, in the form a solver
+    returned it in: as it is for "node", as a MoveList for "moves", and
+    as a finished SearchResult for "result".
+
+    @type path: PuzzleNode | None
+    @type form: str
+    @rtype: PuzzleNode | MoveList | SearchResult | None
+
+    >>> t = MNPuzzle((("1", "*"),), (("*", "1"),))
+    >>> _reform(_rebuild(t, [[["1", "*"]], [["*", "1"]]]), "moves").moves
+    ['left']
+    >>> _reform(None, "result")
+    SearchResult(solved=False, limit=None, nodes=0)
+    """
+    if form == "result":
+        return SearchResult(path, None, path, 0)
+    elif form == "moves" and path is not None:
+        leaf = path
+        while leaf.children:
+            leaf = leaf.children[0]
+        return MoveList.from_node(leaf)
+    return path
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
+    import os
+    import tempfile
+    from time import time
+
+    target_grid = (("1", "2", "3"), ("4", "5", "6"), ("7", "8", "*"))
+    start_grid = (("4", "1", "3"), ("7", "2", "6"), ("*", "5", "8"))
+    cache_path = os.path.join(tempfile.mkdtemp(), "solutions.sqlite")
+    cache = SolutionCache(cache_path)
+    for attempt in ("cold", "warm"):
+        start = time()
+        cache.solve(MNPuzzle(start_grid, target_grid))
+        print("{} solve took {} seconds".format(attempt, time() - start))
+    cache.close()
+    cache = SolutionCache(cache_path)
+    start = time()
+    cache.solve(MNPuzzle(start_grid, target_grid))
+    print("solve from disk took {} seconds".format(time() - start))
+    cache.close()
@@ -0,0 +1,191 @@
+"""
+Whole-array checks on stacks of sudoku boards, for grading and generating
+many SudokuPuzzles at once.
+
+A stack of K nxn boards is an int array of shape (K, n, n) where 0 marks an
+empty position ("*") and 1..n stand for the symbols of the symbol set in
+sorted order.  Requires NumPy.
+"""
+import numpy as np
+from sudoku_puzzle import SudokuPuzzle
+
+
+def to_array(puzzles):
+    """
+    Return the stack of boards of SudokuPuzzles puzzles, which must all have
+    the same size and symbol set.
+
+    @type puzzles: list[SudokuPuzzle]
+    @rtype: numpy.ndarray
+
+    >>> s = SudokuPuzzle(4, ["A", "B", "*", "D"] + ["*"] * 12,
+    ...                  {"A", "B", "C", "D"})
+    >>> to_array([s])[0, 0].tolist()
+    [1, 2, 0, 4]
+    """
+    assert len(puzzles) > 0
+    n, symbol_set = puzzles[0]._n, puzzles[0]._symbol_set
+    assert all([p._n == n and p._symbol_set == symbol_set for p in puzzles])
+    code = {"*": 0}
+    code.update([(d, i) for i, d in enumerate(sorted(symbol_set), 1)])
+    return np.array([[code[d] for d in p._symbols] for p in puzzles],
+                    dtype=np.int16).reshape(len(puzzles), n, n)
+
+
+def from_array(boards, symbol_set):
+    """
+    Return the SudokuPuzzles with symbols from symbol_set on the stack of
+    boards.
+
+    @type boards: numpy.ndarray
+    @type symbol_set: set[str]
+    @rtype: list[SudokuPuzzle]
+
+    >>> boards = np.zeros((2, 4, 4), dtype=int)
+    >>> boards[1, 0, 0] = 3
+    >>> print(from_array(boards, {"A", "B", "C", "D"})[1])
+    C*|**
+    **|**
+    -----
+    **|**
+    **|**
+    """
+    k, n = boards.shape[0], boards.shape[1]
+    symbols = np.array(["*"] + sorted(symbol_set))[boards.reshape(k, n * n)]
+    return [SudokuPuzzle(n, row, symbol_set) for row in symbols.tolist()]
+
+
+def _unit_counts(boards):
+    """
+    Return, for each board, how many times each symbol occurs in each row,
+    each column and each subsquare, with shapes (K, n, n), (K, n, n) and
+    (K, r, r, n) for r the length of a subsquare.
+
+    @type boards: numpy.ndarray
+    @rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+    """
+    k, n = boards.shape[0], boards.shape[1]
+    r = round(n ** (1 / 2))
+    # one_hot[b, i, j, d] is True iff board b has symbol d + 1 at (i, j)
+    one_hot = boards[..., None] == np.arange(1, n + 1)
+    rows = one_hot.sum(axis=2, dtype=np.int16)
+    columns = one_hot.sum(axis=1, dtype=np.int16)
+    subsquares = one_hot.reshape(k, r, r, r, r, n).sum(axis=(2, 4),
+                                                       dtype=np.int16)
+    return rows, columns, subsquares
+
+
+def is_solved(boards):
+    """
+    Return a bool array telling which boards are solved.
+
+    @type boards: numpy.ndarray
+    @rtype: numpy.ndarray
+
+    >>> solved = np.array([[1, 2, 3, 4], [3, 4, 1, 2],
+    ...                    [2, 1, 4, 3], [4, 3, 2, 1]])
+    >>> broken = solved.copy()
+    >>> broken[2, 1], broken[2, 2] = 4, 1
+    >>> is_solved(np.stack([solved, broken])).tolist()
+    [True, False]
+    """
+    rows, columns, subsquares = _unit_counts(boards)
+    return ((boards != 0).all(axis=(1, 2)) &
+            (rows == 1).all(axis=(1, 2)) &
+            (columns == 1).all(axis=(1, 2)) &
+            (subsquares == 1).all(axis=(1, 2, 3)))
+
+
+def candidates(boards):
+    """
+    Return a bool array of shape (K, n, n, n) that is True at [b, i, j, d]
+    iff position (i, j) of board b is empty and symbol d + 1 occurs in
+    none of its row, column and subsquare.
+
+    @type boards: numpy.ndarray
+    @rtype: numpy.ndarray
+
+    >>> board = np.array([[[1, 2, 3, 4], [3, 4, 1, 2],
+    ...                    [2, 1, 4, 3], [4, 3, 2, 0]]])
+    >>> candidates(board)[0, 3, 3].tolist()
+    [True, False, False, False]
+    """
+    n = boards.shape[1]
+    r = round(n ** (1 / 2))
+    rows, columns, subsquares = _unit_counts(boards)
+    subsquares = subsquares.repeat(r, axis=1).repeat(r, axis=2)
+    return ((boards == 0)[..., None] &
+            (rows == 0)[:, :, None, :] &
+            (columns == 0)[:, None, :, :] &
+            (subsquares == 0))
+
+
+def candidate_masks(boards):
+    """
+    Return an int array of shape (K, n, n) whose entry at [b, i, j] has bit
+    d set iff symbol d + 1 is a candidate at (i, j) on board b.
+
+    @type boards: numpy.ndarray
+    @rtype: numpy.ndarray
+
+    >>> board = np.zeros((1, 4, 4), dtype=int)
+    >>> board[0, 0, 0] = 2
+    >>> candidate_masks(board)[0, 0].tolist()
+    [0, 13, 13, 13]
+    """
+    n = boards.shape[1]
+    return (candidates(boards) * (1 << np.arange(n, dtype=np.int64))).sum(
+        axis=-1)
+
+
+def dead(boards):
+    """
+    Return a bool array telling which boards can never be extended to a
+    solution: a symbol repeats within a row, column or subsquare, or some
+    empty position has no candidates.
+
+    @type boards: numpy.ndarray
+    @rtype: numpy.ndarray
+
+    >>> board = np.array([[1, 2, 3, 4], [3, 4, 1, 2],
+    ...                   [2, 1, 4, 1], [4, 3, 2, 0]])
+    >>> clash = np.zeros((4, 4), dtype=int)
+    >>> clash[0, 0] = clash[0, 3] = 1
+    >>> dead(np.stack([board, clash, np.zeros((4, 4), dtype=int)])).tolist()
+    [True, True, False]
+    """
+    rows, columns, subsquares = _unit_counts(boards)
+    clash = ((rows > 1).any(axis=(1, 2)) |
+             (columns > 1).any(axis=(1, 2)) |
+             (subsquares > 1).any(axis=(1, 2, 3)))
+    stuck = ((boards == 0) & ~candidates(boards).any(axis=-1)).any(
+        axis=(1, 2))
+    return clash | stuck
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
+    from time import time
+
+    s = SudokuPuzzle(9,
+                     ["*", "*", "*", "7", "*", "8", "*", "1", "*",
+                      "*", "*", "7", "*", "9", "*", "*", "*", "6",
+                      "9", "*", "3", "1", "*", "*", "*", "*", "*",
+                      "3", "5", "*", "8", "*", "*", "6", "*", "1",
+                      "*", "*", "*", "*", "*", "*", "*", "*", "*",
+                      "1", "*", "6", "*", "*", "9", "*", "4", "8",
+                      "*", "*", "*", "*", "*", "1", "2", "*", "7",
+                      "8", "*", "*", "*", "7", "*", "4", "*", "*",
+                      "*", "6", "*", "3", "*", "2", "*", "*", "*"],
+                     {"1", "2", "3", "4", "5", "6", "7", "8", "9"})
+    puzzles = [s] * 10000
+    start = time()
+    stack = to_array(puzzles)
+    results = is_solved(stack), dead(stack), candidate_masks(stack)
+    print("checked {} boards in {} seconds".format(len(puzzles),
+                                                   time() - start))
+    start = time()
+    results = [(p.is_solved(), p.fail_fast()) for p in puzzles[:1000]]
+    print("checked 1000 boards one at a time in {} seconds".format(
+        time() - start))
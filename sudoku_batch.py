@@ -0,0 +1,191 @@
+"""
+Solve many sudokus at once, given one per line, across worker processes.
+
+Each line holds the n ** 2 positions of an nxn sudoku in row-major order:
+one symbol per position, and ".", "0" or "*" for an empty one, so none
+of these may be a symbol.  Symbols are those of
+sudoku_generator.default_symbols unless others are given.  Workers share
+nothing but the lines they are sent, and solve with the bitmask engine of
+sudoku_solver.
+
+Run as a script to solve the lines of files (or standard input) onto
+standard output, line N of the output answering line N of the input, and
+report throughput on standard error:
+
+    python sudoku_batch.py puzzles.txt > solutions.txt
+"""
+from multiprocessing import Pool, cpu_count
+from sudoku_generator import default_symbols
+from sudoku_solver import search
+
+_EMPTY = ".0*"
+
+# starts the output line of an input line that holds no sudoku
+ERROR = "ERROR"
+
+
+def parse_line(line, symbols=None):
+    """
+    Return the size and board (see sudoku_solver) of the sudoku on line,
+    whose symbols are the first n characters of symbols, in order.  Raise
+    ValueError if line holds no sudoku or symbols cannot spell one.
+
+    @type line: str
+    @type symbols: str | None
+    @rtype: tuple[int, list[int]]
+
+    >>> parse_line("12..3..1.2..4..3")
+    (4, [1, 2, 0, 0, 3, 0, 0, 1, 0, 2, 0, 0, 4, 0, 0, 3])
+    >>> parse_line("12x.3..1.2..4..3")
+    Traceback (most recent call last):
+    ...
+    ValueError: unknown symbol 'x' in 12x.3..1.2..4..3
+    >>> parse_line("..2.2.1.........", "12")
+    Traceback (most recent call last):
+    ...
+    ValueError: symbols '12' do not name 4 different symbols
+    >>> parse_line("..2.2.1.........", "12*4")
+    Traceback (most recent call last):
+    ...
+    ValueError: symbols '12*4' use an empty marker of '.0*'
+    """
+    line = line.strip()
+    n = round(len(line) ** (1 / 2))
+    if n * n != len(line) or round(n ** (1 / 2)) ** 2 != n:
+        raise ValueError("{} is not a square sudoku".format(line))
+    if symbols is None:
+        symbols = "".join(sorted(default_symbols(n)))
+    if len(set(symbols[:n])) < n:
+        raise ValueError("symbols {!r} do not name {} different symbols"
+                         .format(symbols, n))
+    if set(symbols[:n]) & set(_EMPTY):
+        raise ValueError("symbols {!r} use an empty marker of {!r}"
+                         .format(symbols, _EMPTY))
+    code = dict([(c, 0) for c in _EMPTY])
+    code.update([(c, i) for i, c in enumerate(symbols[:n], 1)])
+    for c in line:
+        if c not in code:
+            raise ValueError("unknown symbol {!r} in {}".format(c, line))
+    return n, [code[c] for c in line]
+
+
+def format_board(n, board, symbols=None):
+    """
+    Return the nxn board as a line, in symbols.
+
+    @type n: int
+    @type board: list[int]
+    @type symbols: str | None
+    @rtype: str
+
+    >>> format_board(4, [1, 2, 0, 4] + [0] * 12)
+    '12.4............'
+    """
+    if symbols is None:
+        symbols = "".join(sorted(default_symbols(n)))
+    return "".join([symbols[d - 1] if d else "." for d in board])
+
+
+def solve_line(line, symbols=None):
+    """
+    Return the solution of the sudoku on line as a line, or an empty string
+    if it has none or line is blank.  Raise ValueError if line does not
+    hold a sudoku.
+
+    @type line: str
+    @type symbols: str | None
+    @rtype: str
+
+    >>> solve_line("..2.2.1..3......")
+    '3124241313424231'
+    >>> solve_line("11..............")
+    ''
+    >>> solve_line("")
+    ''
+    """
+    if not line.strip():
+        return ""
+    n, board = parse_line(line, symbols)
+    first = search(n, board)[1]
+    return "" if first is None else format_board(n, first, symbols)
+
+
+def _solve_job(job):
+    """
+    Return solve_line(*job), for a worker process, or ERROR and the reason
+    if the line does not hold a sudoku, so that one bad line does not stop
+    the batch.
+
+    @type job: tuple[str, str | None]
+    @rtype: str
+
+    >>> _solve_job(("12x.3..1.2..4..3", None))
+    "ERROR unknown symbol 'x' in 12x.3..1.2..4..3"
+    """
+    try:
+        return solve_line(*job)
+    except ValueError as e:
+        return "{} {}".format(ERROR, e)
+
+
+def solve_lines(lines, symbols=None, processes=None, chunksize=64):
+    """
+    Yield the solutions of the sudokus on lines, as solve_line does, one
+    per line and in the order of lines, solving chunks of chunksize lines
+    on processes worker processes (one per core by default; none if
+    processes is 1).  A blank line yields an empty string, and a line that
+    does not hold a sudoku yields ERROR followed by the reason.
+
+    @type lines: Iterable[str]
+    @type symbols: str | None
+    @type processes: int | None
+    @type chunksize: int
+    @rtype: Iterator[str]
+
+    >>> list(solve_lines(["..2.2.1..3......", "", "11..............",
+    ...                   "123"], processes=1))
+    ['3124241313424231', '', '', 'ERROR 123 is not a square sudoku']
+    """
+    jobs = ((line, symbols) for line in lines)
+    if processes == 1:
+        for job in jobs:
+            yield _solve_job(job)
+        return
+    with Pool(cpu_count() if processes is None else processes) as pool:
+        for solution in pool.imap(_solve_job, jobs, chunksize):
+            yield solution
+
+
+if __name__ == "__main__":
+    import argparse
+    import fileinput
+    import sys
+    from time import perf_counter
+
+    parser = argparse.ArgumentParser(
+        description="Solve sudokus given one per line.")
+    parser.add_argument("files", nargs="*",
+                        help="files of sudokus (standard input if none)")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--symbols", default=None,
+                        help="symbols in order (default: 1-9 then A-P)")
+    parser.add_argument("--chunksize", type=int, default=64,
+                        help="sudokus sent to a worker at a time")
+    args = parser.parse_args()
+
+    start, solved, errors, total = perf_counter(), 0, 0, 0
+    with fileinput.input(args.files) as lines:
+        for solution in solve_lines(lines, args.symbols, args.processes,
+                                    args.chunksize):
+            print(solution)
+            total += 1
+            if solution.startswith(ERROR):
+                errors += 1
+            elif solution:
+                solved += 1
+    elapsed = perf_counter() - start
+    print("solved {} of {} lines ({} not sudokus) in {:.2f} seconds "
+          "({:.0f} lines/sec)".format(solved, total, errors, elapsed,
+                                      total / elapsed if elapsed else 0),
+          file=sys.stderr)
@@ -0,0 +1,191 @@
+"""
+Generate SudokuPuzzles with unique solutions.
+
+A random full board is filled in, then clues are removed in random order,
+each removal kept only while the sudoku still has exactly one solution.
+"""
+from multiprocessing import Pool, cpu_count
+from random import Random
+from sudoku_solver import from_board, search
+
+# symbols used for the usual board sizes
+_SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+
+# most guesses the solver may need for each grade of difficulty
+_GRADES = [("easy", 0), ("medium", 5), ("hard", 50), ("expert", None)]
+
+
+def default_symbols(n):
+    """
+    Return the symbol set conventionally used for an nxn sudoku.
+
+    @type n: int
+    @rtype: set[str]
+
+    >>> sorted(default_symbols(4))
+    ['1', '2', '3', '4']
+    """
+    assert n <= len(_SYMBOLS)
+    return set(_SYMBOLS[:n])
+
+
+def random_board(n, rng):
+    """
+    Return a random full nxn board.
+
+    @type n: int
+    @type rng: random.Random
+    @rtype: list[int]
+
+    >>> from sudoku_solver import from_board
+    >>> board = random_board(9, Random(0))
+    >>> from_board(9, board, default_symbols(9)).is_solved()
+    True
+    """
+    return search(n, [0] * (n * n), rng=rng)[1]
+
+
+def grade(n, board):
+    """
+    Return the grade of difficulty of the nxn board ("easy", "medium",
+    "hard" or "expert") and how many guesses solving it takes.
+
+    A board that is solved by repeatedly filling in positions with a
+    single candidate needs no guesses.
+
+    @type n: int
+    @type board: list[int]
+    @rtype: tuple[str, int]
+
+    >>> grade(4, [1, 2, 3, 4, 3, 4, 1, 2, 2, 1, 4, 3, 4, 3, 2, 0])
+    ('easy', 0)
+    """
+    guesses = search(n, board)[2]
+    for name, most in _GRADES:
+        if most is None or guesses <= most:
+            return name, guesses
+
+
+def generate_board(n, clues=None, rng=None):
+    """
+    Return a random nxn board with a unique solution and no more clues than
+    needed to keep it unique, stopping early once only clues are left.
+
+    @type n: int
+    @type clues: int | None
+    @type rng: random.Random | None
+    @rtype: list[int]
+
+    >>> board = generate_board(4, rng=Random(1))
+    >>> search(4, board, limit=2)[0]
+    1
+    >>> 16 - board.count(0) >= 4
+    True
+    """
+    rng = Random() if rng is None else rng
+    board = random_board(n, rng)
+    positions = list(range(n * n))
+    rng.shuffle(positions)
+    left = n * n
+    for i in positions:
+        if clues is not None and left <= clues:
+            break
+        d, board[i] = board[i], 0
+        if search(n, board, limit=2)[0] == 1:
+            left -= 1
+        else:
+            board[i] = d
+    return board
+
+
+def generate(n=9, clues=None, difficulty=None, seed=None, attempts=100):
+    """
+    Return a random nxn SudokuPuzzle with a unique solution, at most clues
+    clues if that many can be removed, and the given grade of difficulty.
+    Raise ValueError if difficulty is not a grade, or if no board of that
+    grade is found within attempts boards.
+
+    @type n: int
+    @type clues: int | None
+    @type difficulty: str | None
+    @type seed: int | None
+    @type attempts: int
+    @rtype: SudokuPuzzle
+
+    >>> s = generate(4, seed=2)
+    >>> from sudoku_solver import count_solutions
+    >>> count_solutions(s)
+    1
+    >>> generate(4, difficulty="hrad")
+    Traceback (most recent call last):
+    ...
+    ValueError: unknown difficulty hrad
+    >>> generate(4, difficulty="expert", seed=2, attempts=3)
+    Traceback (most recent call last):
+    ...
+    ValueError: no expert 4x4 sudoku found in 3 attempts
+    """
+    if difficulty is not None and difficulty not in dict(_GRADES):
+        raise ValueError("unknown difficulty {}".format(difficulty))
+    rng = Random(seed)
+    for _ in range(attempts):
+        board = generate_board(n, clues, rng)
+        if difficulty is None or grade(n, board)[0] == difficulty:
+            return from_board(n, board, default_symbols(n))
+    raise ValueError("no {} {}x{} sudoku found in {} attempts".format(
+        difficulty, n, n, attempts))
+
+
+def _generate_seeded(args):
+    """
+    Return generate(*args) for a worker process.
+
+    @type args: tuple
+    @rtype: SudokuPuzzle
+    """
+    return generate(*args)
+
+
+def generate_many(count, n=9, clues=None, difficulty=None, seed=None,
+                  processes=None):
+    """
+    Return a list of count SudokuPuzzles made as by generate, spread over
+    processes worker processes (one per core by default).
+
+    Each puzzle gets its own seed, derived from seed, so a run with a seed
+    is repeatable whatever the number of processes.
+
+    @type count: int
+    @type n: int
+    @type clues: int | None
+    @type difficulty: str | None
+    @type seed: int | None
+    @type processes: int | None
+    @rtype: list[SudokuPuzzle]
+
+    # doctest not feasible: starts worker processes.
+    """
+    rng = Random(seed)
+    jobs = [(n, clues, difficulty, rng.getrandbits(64))
+            for _ in range(count)]
+    processes = cpu_count() if processes is None else processes
+    with Pool(processes) as pool:
+        return pool.map(_generate_seeded, jobs,
+                        chunksize=max(1, count // (4 * processes)))
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
+    from time import time
+
+    for size in (4, 9):
+        start = time()
+        puzzles = generate_many(100, size, seed=0)
+        end = time()
+        print("generated {} {}x{} sudokus in {} seconds".format(
+            len(puzzles), size, size, end - start))
+    print(puzzles[0])
+    start = time()
+    print(generate(16, clues=140, seed=0))
+    print("generated a 16x16 sudoku in {} seconds".format(time() - start))
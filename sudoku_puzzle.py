@@ -1,4 +1,5 @@
 from puzzle import Puzzle
+from sudoku_units import UnitIndex
 
 class SudokuPuzzle(Puzzle):
     """
@@ -21,6 +22,7 @@ class SudokuPuzzle(Puzzle):
         assert len(symbol_set) == n
         assert len(symbols) == n ** 2
         self._n, self._symbols, self._symbol_set = n, symbols, symbol_set
+        self._hash = hash(self.key())
 
     def __eq__(self, other):
         """
@@ -49,10 +51,16 @@ class SudokuPuzzle(Puzzle):
         >>> s3 = SudokuPuzzle(4, grid3, {"A", "B", "C", "D"})
         >>> s1 == s3
         False
+        >>> hash(s1) == hash(s2)
+        True
         """
-        return (type(self) == type(other) and
-                self._n == other._n and self._symbols == other._symbols and
-                self._symbol_set == other._symbol_set)
+        return self is other or (
+            type(self) == type(other) and self._hash == other._hash and
+            self._n == other._n and self._symbols == other._symbols and
+            (self._symbol_set is other._symbol_set or
+             self._symbol_set == other._symbol_set))
+
+    __hash__ = Puzzle.__hash__
 
     def __str__(self):
         """
@@ -129,13 +137,69 @@ class SudokuPuzzle(Puzzle):
         >>> s.is_solved()
         False
         """
-        n, symbols = self._n, self._symbols
+        symbols = self._symbols
         # no "*" left and all rows, column, sub-squares have correct symbols
         return ("*" not in symbols and
-                all([(self._row_set(i) == self._symbol_set and
-                      self._column_set(i) == self._symbol_set and
-                      self._subsquare_set(i) == self._symbol_set)
-                     for i in range(n ** 2)]))
+                all([set([symbols[i] for i in unit]) == self._symbol_set
+                     for unit in UnitIndex.classic(self._n).units]))
+
+    def heuristic(self):
+        """
+        Return the number of empty positions of SudokuPuzzle self, the
+        number of moves left.
+
+        @type self: SudokuPuzzle
+        @rtype: int
+
+        >>> s = SudokuPuzzle(4, ["A"] + ["*"] * 15, {"A", "B", "C", "D"})
+        >>> s.heuristic()
+        15
+        """
+        return self._symbols.count("*")
+
+    def score(self):
+        """
+        Return the number of empty positions of SudokuPuzzle self plus the
+        fewest symbols any of them still allows, so that among puzzles with
+        as many positions filled those closest to forced moves come first.
+        In a dead end, where some position allows no symbol, that fewest
+        counts as n + 1.
+
+        @type self: SudokuPuzzle
+        @rtype: int
+
+        >>> grid = ["A", "B", "C", "*"]
+        >>> grid += ["*"] * 12
+        >>> SudokuPuzzle(4, grid, {"A", "B", "C", "D"}).score()
+        14
+        >>> from puzzle_tools import beam_search_solve
+        >>> grid = ["*", "*", "C", "*"]
+        >>> grid += ["C", "*", "*", "*"]
+        >>> grid += ["*", "A", "*", "*"]
+        >>> grid += ["*", "*", "B", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> path = beam_search_solve(s, width=2, moves=True)
+        >>> path[-1].is_solved()
+        True
+        """
+        symbols = self._symbols
+        counts = [len(self._allowed(i)) for i in range(len(symbols))
+                  if symbols[i] == "*"]
+        if not counts:
+            return 0
+        return len(counts) + (self._n + 1 if 0 in counts else min(counts))
+
+    def key(self):
+        """
+        Return the symbols of SudokuPuzzle self.
+
+        @type self: SudokuPuzzle
+        @rtype: tuple[str]
+
+        >>> SudokuPuzzle(1, ["*"], {"A"}).key()
+        ('*',)
+        """
+        return tuple(self._symbols)
 
     def extensions(self):
         """
@@ -167,15 +231,54 @@ class SudokuPuzzle(Puzzle):
             # position of first empty position
             i = symbols.index("*")
             # allowed symbols at position i
-            # A | B == A.union(B)
-            allowed_symbols = (self._symbol_set -
-                               (self._row_set(i) |
-                                self._column_set(i) |
-                                self._subsquare_set(i)))
+            allowed_symbols = self._allowed(i)
             # list of SudokuPuzzles with each legal digit at position i
             return ([SudokuPuzzle(n, symbols[:i] + [d] + symbols[i + 1:],
                                   symbol_set) for d in allowed_symbols])
 
+    def move_to(self, other):
+        """
+        Return the position SudokuPuzzle self fills in to become its
+        extension other, and the symbol it fills in there.
+
+        @type self: SudokuPuzzle
+        @type other: SudokuPuzzle
+        @rtype: tuple[int, str]
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["C", "D", "A", "B"]
+        >>> grid += ["B", "A", "D", "C"]
+        >>> grid += ["D", "C", "B", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> [s.move_to(e) for e in s.extensions()]
+        [(15, 'A')]
+        """
+        i = self._symbols.index("*")
+        if other._symbols[i] == "*":
+            i = [j for j in range(len(self._symbols))
+                 if self._symbols[j] != other._symbols[j]][0]
+        return i, other._symbols[i]
+
+    def apply_move(self, move):
+        """
+        Return the extension of SudokuPuzzle self with symbol move[1] at
+        position move[0].
+
+        @type self: SudokuPuzzle
+        @type move: tuple[int, str]
+        @rtype: SudokuPuzzle
+
+        >>> s = SudokuPuzzle(4, ["*"] * 16, {"A", "B", "C", "D"})
+        >>> s.apply_move((1, "C"))._symbols[:4]
+        ['*', 'C', '*', '*']
+        """
+        i, d = move
+        if self._symbols[i] != "*" or d not in self._symbol_set:
+            raise ValueError("illegal move {}".format(move))
+        return SudokuPuzzle(self._n,
+                            self._symbols[:i] + [d] + self._symbols[i + 1:],
+                            self._symbol_set)
+
     def fail_fast(self):
         """
         Return True iff SudokuPuzzle can never be extended to a solution.
@@ -191,83 +294,61 @@ class SudokuPuzzle(Puzzle):
         >>> s.fail_fast()
         True
         """
-        # Assign the variables as in __init__(self) for the convenience
-        n, symbols, symbol_set = self._n, self._symbols, self._symbol_set
-
-        # Check whether the SudokuPuzzle has already been solved
-        # Check for atleast one empty positions in each grid of the SudokuPuzzle
-        # Check if the _row_set, _column_set,
-        # _subsquare_set have been exhausted for that empty space
-        # Find the first one matching
-        # the above case and return True Or its False
-        if (symbols.count("*") == 0) or self.is_solved():
-            return False
-        else:
-            # shorter way of going checking each "*". Enumerate?
-            i = 0
-            # Can I just use while False?
-            # If so, how should I return True when While loop stops
-            flag = False
-            while flag is False and i <= (len(symbols) - 1):
-                if symbols[i] == "*":
-                    allowed_symbols = (self._symbol_set -
-                                       (self._row_set(i) |
-                                        self._column_set(i) |
-                                        self._subsquare_set(i)))
-                    if len(allowed_symbols) == 0:
-                        flag = True
-                    i += 1
-                i += 1
-            return flag
-
-    def _row_set(self, m):
-        #
-        # Return set of symbols in row of SudokuPuzzle self's symbols
-        # where position m occurs.
-        #
-        # @type self: SudokuPuzzle
-        # @type m: int
-        assert 0 <= m < self._n ** 2
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # first position in m's row
-        r = (m // n) * n
-        # set of elements from symbols[r] .. symbols[r+n-1]
-        return set([symbols[r + i] for i in range(n)])
-
-    def _column_set(self, m):
-        # Return set of symbols in column of SudokuPuzzle self's symbols
-        # where position m occurs.
-        #
-        # @type self: SudokuPuzzle
-        # @type m: int
-        assert 0 <= m <= self._n ** 2
-        # convenient names
-        symbols, n = self._symbols, self._n
-        # first position in m's column
-        c = m % n
-        # set of elements from symbols[c], symbols[c + n],
-        # ... symbols[c + (n * (n-1))]
-        return set([symbols[c + (i * n)] for i in range(n)])
-
-    def _subsquare_set(self, m):
-        # Return set of symbols in subsquare of SudokuPuzzle self's symbols
-        # where position m occurs.
-        #
-        # @type self: SudokuPuzzle
-        # @type m: int
-        assert 0 <= m < self._n ** 2
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # row, column where m occur
-        row, col = m // n, m % n
-        # length of subsquares
-        ss = round(n ** (1 / 2))
-        # upper-left position of m's subsquare
-        ul = (((row // ss) * ss) * n) + ((col // ss) * ss)
-        # return set of symbols from subsquare starting at ul
-        return set(
-            [symbols[ul + i + n * j] for i in range(ss) for j in range(ss)])
+        symbols = self._symbols
+        # some empty position has no symbol left that its row, column and
+        # subsquare allow
+        return any([not self._allowed(i) for i in range(len(symbols))
+                    if symbols[i] == "*"])
+
+    def _allowed(self, i):
+        """
+        Return the symbols that position i of SudokuPuzzle self may hold:
+        those of none of its peers.
+
+        @type self: SudokuPuzzle
+        @type i: int
+        @rtype: set[str]
+
+        >>> s = SudokuPuzzle(4, ["A", "*", "*", "*", "*", "B"] + ["*"] * 10,
+        ...                  {"A", "B", "C", "D"})
+        >>> sorted(s._allowed(1))
+        ['C', 'D']
+        """
+        symbols = self._symbols
+        return self._symbol_set - set(
+            [symbols[p] for p in UnitIndex.classic(self._n).peers[i]])
+
+def least_constraining_first(puzzle, extensions):
+    """
+    Return extensions of SudokuPuzzle puzzle ordered for depth_first_solve:
+    symbols that rule out the fewest candidates of the other empty
+    positions in the same row, column and subsquare first, ties in symbol
+    order so that the search does not depend on set iteration order.
+
+    @type puzzle: SudokuPuzzle
+    @type extensions: list[SudokuPuzzle]
+    @rtype: list[SudokuPuzzle]
+
+    >>> grid = ["*", "*", "D", "*"]
+    >>> grid += ["*", "*", "C", "*"]
+    >>> grid += ["*", "*", "*", "*"]
+    >>> grid += ["B", "*", "*", "*"]
+    >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+    >>> [e._symbols[0] for e in least_constraining_first(s, s.extensions())]
+    ['C', 'A']
+    """
+    if not extensions:
+        return extensions
+    symbols = puzzle._symbols
+    i = puzzle.move_to(extensions[0])[0]
+    # how many empty peers of position i still allow each symbol
+    allowing = {}
+    for p in UnitIndex.classic(puzzle._n).peers[i]:
+        if symbols[p] == "*":
+            for d in puzzle._allowed(p):
+                allowing[d] = allowing.get(d, 0) + 1
+    return sorted(extensions, key=lambda e: (allowing.get(e._symbols[i], 0),
+                                             e._symbols[i]))
 
 if __name__ == "__main__":
     import doctest
@@ -0,0 +1,106 @@
+"""
+A fast sudoku engine working on bitmasks rather than on SudokuPuzzles, for
+solving and for counting the solutions of a sudoku.
+
+A board is a list of n ** 2 ints in row-major order, where 0 marks an empty
+position and 1..n stand for the symbols of the symbol set in sorted order.
+"""
+from sudoku_puzzle import SudokuPuzzle
+from sudoku_units import UnitIndex
+
+
+def to_board(puzzle):
+    """
+    Return the board of SudokuPuzzle puzzle.
+
+    @type puzzle: SudokuPuzzle
+    @rtype: list[int]
+
+    >>> s = SudokuPuzzle(4, ["A", "B", "*", "D"] + ["*"] * 12,
+    ...                  {"A", "B", "C", "D"})
+    >>> to_board(s)[:4]
+    [1, 2, 0, 4]
+    """
+    code = {"*": 0}
+    code.update([(d, i) for i, d in enumerate(sorted(puzzle._symbol_set),
+                                              1)])
+    return [code[d] for d in puzzle._symbols]
+
+
+def from_board(n, board, symbol_set):
+    """
+    Return the nxn SudokuPuzzle with board filled in from symbol_set.
+
+    @type n: int
+    @type board: list[int]
+    @type symbol_set: set[str]
+    @rtype: SudokuPuzzle
+
+    >>> print(from_board(4, [1, 2, 0, 4] + [0] * 12, {"A", "B", "C", "D"}))
+    AB|*D
+    **|**
+    -----
+    **|**
+    **|**
+    """
+    symbols = ["*"] + sorted(symbol_set)
+    return SudokuPuzzle(n, [symbols[d] for d in board], symbol_set)
+
+
+def search(n, board, limit=1, rng=None):
+    """
+    Return how many solutions of the nxn board were found, stopping at
+    limit, the first solution found (or None) and how many times the search
+    had to guess between two or more symbols.
+
+    Positions are filled most-constrained first (see UnitIndex.search).  If
+    rng is given, symbols are tried in an order shuffled by it.
+
+    @type n: int
+    @type board: list[int]
+    @type limit: int
+    @type rng: random.Random | None
+    @rtype: tuple[int, list[int] | None, int]
+
+    >>> count, first, guesses = search(4, [0] * 16, limit=2)
+    >>> count, len(first), guesses > 0
+    (2, 16, True)
+    >>> search(4, [1, 1] + [0] * 14)
+    (0, None, 0)
+    """
+    return UnitIndex.classic(n).search(board, limit, rng)
+
+
+def solve(puzzle):
+    """
+    Return the solved SudokuPuzzle extending puzzle, or None if there is
+    none.
+
+    @type puzzle: SudokuPuzzle
+    @rtype: SudokuPuzzle | None
+
+    >>> s = SudokuPuzzle(4, ["A", "*", "*", "D", "*", "*", "A", "*",
+    ...                      "*", "A", "*", "*", "D", "*", "*", "A"],
+    ...                  {"A", "B", "C", "D"})
+    >>> solve(s).is_solved()
+    True
+    """
+    count, first, _ = search(puzzle._n, to_board(puzzle))
+    return (None if first is None else
+            from_board(puzzle._n, first, puzzle._symbol_set))
+
+
+def count_solutions(puzzle, limit=2):
+    """
+    Return the number of solutions of puzzle, counting no further than
+    limit.
+
+    @type puzzle: SudokuPuzzle
+    @type limit: int
+    @rtype: int
+
+    >>> s = SudokuPuzzle(4, ["*"] * 16, {"A", "B", "C", "D"})
+    >>> count_solutions(s), count_solutions(s, limit=1000)
+    (2, 288)
+    """
+    return search(puzzle._n, to_board(puzzle), limit)[0]
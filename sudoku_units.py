@@ -0,0 +1,418 @@
+"""
+The constraint units of sudoku variants, indexed by position, and a search
+over boards (see sudoku_solver) that works for any of them.
+
+A unit is a group of positions that must hold distinct symbols: a row,
+column or subsquare of the classic sudoku, a main diagonal of the X-sudoku,
+an irregular region of a jigsaw sudoku or a cage of a killer sudoku.  A
+cage also has a total its symbols, counted as 1..n, must add up to.  The
+peers of a position are the other positions sharing a unit with it.
+"""
+
+# UnitIndex of the classic sudoku of each size, built once
+_classics = {}
+
+
+def _bits(mask):
+    """
+    Return the symbols, 1..n, set in bitmask mask.
+
+    @type mask: int
+    @rtype: list[int]
+
+    >>> _bits(0b1011)
+    [1, 2, 4]
+    """
+    return [d + 1 for d in range(mask.bit_length()) if mask >> d & 1]
+
+
+class UnitIndex:
+    """
+    The units, cages and peers of each position of an nxn sudoku variant.
+    """
+
+    def __init__(self, n, units, cages=()):
+        """
+        Create a new UnitIndex self for nxn boards, whose positions are
+        0..n ** 2 - 1 in row-major order, with units of positions holding
+        distinct symbols and cages of positions whose symbols also add up
+        to a total.
+
+        @type self: UnitIndex
+        @type n: int
+        @type units: list[list[int]]
+        @type cages: list[tuple[list[int], int]]
+        @rtype: None
+
+        >>> index = UnitIndex(2, [[0, 1], [2, 3], [0, 2], [1, 3]])
+        >>> index.units_of[0], index.peers[0]
+        ((0, 2), (1, 2))
+        """
+        self.n = n
+        self.cages = tuple([(tuple(cells), total) for cells, total in cages])
+        self.units = (tuple([tuple(unit) for unit in units]) +
+                      tuple([cells for cells, _ in self.cages]))
+        self.units_of = tuple([tuple([u for u, unit in enumerate(self.units)
+                                      if i in unit])
+                               for i in range(n * n)])
+        self.cages_of = tuple([tuple([c for c, (cells, _) in
+                                      enumerate(self.cages) if i in cells])
+                               for i in range(n * n)])
+        self.peers = tuple([tuple(sorted(set(
+            [j for u in self.units_of[i] for j in self.units[u]
+             if j != i]))) for i in range(n * n)])
+
+    @staticmethod
+    def _lines(n):
+        """
+        Return the rows and columns of an nxn board.
+
+        @type n: int
+        @rtype: list[list[int]]
+
+        >>> UnitIndex._lines(2)
+        [[0, 1], [2, 3], [0, 2], [1, 3]]
+        """
+        return ([[r * n + c for c in range(n)] for r in range(n)] +
+                [[r * n + c for r in range(n)] for c in range(n)])
+
+    @staticmethod
+    def _subsquares(n):
+        """
+        Return the subsquares of an nxn board.
+
+        @type n: int
+        @rtype: list[list[int]]
+
+        >>> UnitIndex._subsquares(4)[1]
+        [2, 3, 6, 7]
+        """
+        r = round(n ** (1 / 2))
+        return [[(b // r * r + i) * n + b % r * r + j
+                 for i in range(r) for j in range(r)] for b in range(n)]
+
+    @staticmethod
+    def classic(n):
+        """
+        Return the UnitIndex of the classic nxn sudoku: rows, columns and
+        subsquares.
+
+        @type n: int
+        @rtype: UnitIndex
+
+        >>> UnitIndex.classic(4).peers[0]
+        (1, 2, 3, 4, 5, 8, 12)
+        >>> UnitIndex.classic(9) is UnitIndex.classic(9)
+        True
+        """
+        if n not in _classics:
+            _classics[n] = UnitIndex(n, UnitIndex._lines(n) +
+                                     UnitIndex._subsquares(n))
+        return _classics[n]
+
+    @staticmethod
+    def diagonal(n):
+        """
+        Return the UnitIndex of the nxn X-sudoku: a classic sudoku whose
+        two main diagonals also hold distinct symbols.
+
+        @type n: int
+        @rtype: UnitIndex
+
+        >>> UnitIndex.diagonal(4).units[-1]
+        (3, 6, 9, 12)
+        """
+        return UnitIndex(n, UnitIndex._lines(n) + UnitIndex._subsquares(n) +
+                         [[i * n + i for i in range(n)],
+                          [i * n + n - 1 - i for i in range(n)]])
+
+    @staticmethod
+    def jigsaw(n, regions):
+        """
+        Return the UnitIndex of the nxn jigsaw sudoku whose irregular
+        regions take the place of subsquares, given as the region of each
+        position in row-major order.
+
+        @type n: int
+        @type regions: Sequence[Hashable]
+        @rtype: UnitIndex
+
+        >>> index = UnitIndex.jigsaw(4, "aaab" "acbb" "ccdb" "cddd")
+        >>> index.units[-4:]
+        ((0, 1, 2, 4), (3, 6, 7, 11), (5, 8, 9, 12), (10, 13, 14, 15))
+        """
+        assert len(regions) == n * n
+        labels = sorted(set(regions), key=list(regions).index)
+        return UnitIndex(n, UnitIndex._lines(n) + [
+            [i for i in range(n * n) if regions[i] == label]
+            for label in labels])
+
+    @staticmethod
+    def killer(n, cages):
+        """
+        Return the UnitIndex of the nxn killer sudoku: a classic sudoku with
+        cages of positions holding distinct symbols that add up to a total.
+
+        @type n: int
+        @type cages: list[tuple[list[int], int]]
+        @rtype: UnitIndex
+
+        >>> index = UnitIndex.killer(4, [([0, 1], 3)])
+        >>> index.cages_of[0], index.cages_of[2]
+        ((0,), ())
+        """
+        return UnitIndex(n, UnitIndex._lines(n) + UnitIndex._subsquares(n),
+                         cages)
+
+    def _cage_symbols(self, used, left, empty):
+        """
+        Return the bitmask of symbols the empty positions of a cage may
+        still hold when its symbols so far are bitmask used and the empty
+        positions must add up to left: 0 if they cannot.
+
+        @type self: UnitIndex
+        @type used: int
+        @type left: int
+        @type empty: int
+        @rtype: int
+
+        >>> bin(UnitIndex.classic(4)._cage_symbols(0b0001, 3, 1))
+        '0b100'
+        >>> UnitIndex.classic(4)._cage_symbols(0b0001, 5, 1)
+        0
+        >>> bin(UnitIndex.classic(4)._cage_symbols(0b0000, 3, 2))
+        '0b11'
+        """
+        full = (1 << self.n) - 1
+        if not empty:
+            return 0 if left else full
+        free = _bits(full & ~used)
+        if not (empty <= len(free) and
+                sum(free[:empty]) <= left <= sum(free[len(free) - empty:])):
+            return 0
+        # each symbol leaves the other empty positions to make up the rest
+        low = left - sum(free[len(free) - empty + 1:])
+        high = left - sum(free[:empty - 1])
+        return sum([1 << (d - 1) for d in free if low <= d <= high])
+
+    def candidates(self, board):
+        """
+        Return the bitmask of symbols each empty position of board may
+        still hold (0 for filled positions), or None if board already
+        breaks a unit or a cage of UnitIndex self.
+
+        @type self: UnitIndex
+        @type board: list[int]
+        @rtype: list[int] | None
+
+        >>> UnitIndex.classic(4).candidates([1, 0, 0, 0] + [0] * 12)[:5]
+        [0, 14, 14, 14, 14]
+        >>> UnitIndex.classic(4).candidates([1, 1] + [0] * 14) is None
+        True
+        >>> index = UnitIndex.killer(4, [([0, 1], 3)])
+        >>> index.candidates([3] + [0] * 15) is None
+        True
+        """
+        used = [0] * len(self.units)
+        for u, unit in enumerate(self.units):
+            for i in unit:
+                if board[i]:
+                    bit = 1 << (board[i] - 1)
+                    if used[u] & bit:
+                        return None
+                    used[u] |= bit
+        full = (1 << self.n) - 1
+        masks = []
+        for i, d in enumerate(board):
+            mask = 0
+            if not d:
+                mask = full
+                for u in self.units_of[i]:
+                    mask &= ~used[u]
+            masks.append(mask)
+        for c, (cells, total) in enumerate(self.cages):
+            allowed = self._cage_symbols(
+                used[len(self.units) - len(self.cages) + c],
+                total - sum([board[i] for i in cells]),
+                [board[i] for i in cells].count(0))
+            if not allowed:
+                return None
+            for i in cells:
+                masks[i] &= allowed
+        return masks
+
+    def search(self, board, limit=1, rng=None):
+        """
+        Return how many solutions of board under UnitIndex self were found,
+        stopping at limit, the first solution found (or None) and how many
+        times the search had to guess between two or more symbols.
+
+        The candidates of every empty position are kept up to date as
+        positions are filled, most-constrained first, and a branch is given
+        up as soon as some position or cage is left with no way to be
+        filled.  If rng is given, symbols are tried in an order shuffled by
+        it.
+
+        @type self: UnitIndex
+        @type board: list[int]
+        @type limit: int
+        @type rng: random.Random | None
+        @rtype: tuple[int, list[int] | None, int]
+
+        >>> index = UnitIndex.diagonal(4)
+        >>> count, first, _ = index.search([0] * 16, limit=100)
+        >>> count, first
+        (48, [1, 2, 4, 3, 3, 4, 2, 1, 2, 1, 3, 4, 4, 3, 1, 2])
+        >>> cages = [([0, 4], 3), ([1, 2], 7), ([12, 13, 14], 6)]
+        >>> UnitIndex.killer(4, cages).search([0] * 16, limit=100)[0]
+        10
+
+        A position whose peer runs out of candidates before its cage is
+        reached leaves the cage as it was:
+
+        >>> UnitIndex.killer(4, [([2, 14], 5)]).search([0] * 16, limit=300)[0]
+        96
+        """
+        masks = self.candidates(board)
+        if masks is None:
+            return 0, None, 0
+        board, peers = board[:], self.peers
+        cages, cages_of = self.cages, self.cages_of
+        # what is still to be added up in each cage, by how many positions,
+        # and the symbols already in it
+        lefts = [total - sum([board[i] for i in cells])
+                 for cells, total in self.cages]
+        opens = [[board[i] for i in cells].count(0)
+                 for cells, _ in self.cages]
+        inside = [sum([1 << (board[i] - 1) for i in cells if board[i]])
+                  for cells, _ in self.cages]
+        empty = [i for i, d in enumerate(board) if not d]
+        # positions and the candidates they lost, and cages c (as -1 - c)
+        # and the symbols added to them, given back down to a mark on
+        # backtracking
+        trail = []
+        found = {"count": 0, "first": None, "guesses": 0}
+
+        def _place(i, d):
+            """
+            Fill position i with symbol d, taking d from the candidates of
+            its peers and what its cages can no longer add up to from the
+            candidates of their positions, and return whether every
+            position can still be filled.
+
+            @type i: int
+            @type d: int
+            @rtype: bool
+            """
+            bit = 1 << (d - 1)
+            board[i] = d
+            for p in peers[i]:
+                mask = masks[p]
+                if mask & bit:
+                    masks[p] = mask ^ bit
+                    trail.append((p, bit))
+                    if mask == bit:
+                        return False
+            for c in cages_of[i]:
+                lefts[c] -= d
+                opens[c] -= 1
+                inside[c] |= bit
+                trail.append((-1 - c, d))
+                allowed = self._cage_symbols(inside[c], lefts[c], opens[c])
+                if not allowed:
+                    return False
+                for p in cages[c][0]:
+                    mask = masks[p]
+                    if mask & ~allowed:
+                        masks[p] = mask & allowed
+                        trail.append((p, mask & ~allowed))
+                        if not mask & allowed:
+                            return False
+            return True
+
+        def _unplace(i, mark):
+            """
+            Undo filling position i, giving back the candidates taken and
+            the cage symbols added since trail was mark long; _place may
+            have stopped before reaching all of them.
+
+            @type i: int
+            @type mark: int
+            @rtype: None
+            """
+            while len(trail) > mark:
+                p, taken = trail.pop()
+                if p < 0:
+                    c = -1 - p
+                    lefts[c] += taken
+                    opens[c] += 1
+                    inside[c] &= ~(1 << (taken - 1))
+                else:
+                    masks[p] |= taken
+            board[i] = 0
+
+        def _fill(left):
+            """
+            Fill in the left last positions of empty, counting the solutions
+            found, and return True iff limit solutions have been found.
+
+            @type left: int
+            @rtype: bool
+            """
+            if left == 0:
+                found["count"] += 1
+                if found["first"] is None:
+                    found["first"] = board[:]
+                return found["count"] >= limit
+            # swap the empty position with fewest candidates to the end
+            best, best_count = -1, self.n + 1
+            for k in range(left):
+                count = bin(masks[empty[k]]).count("1")
+                if count < best_count:
+                    best, best_count = k, count
+                    if count <= 1:
+                        break
+            if best_count == 0:
+                return False
+            empty[best], empty[left - 1] = empty[left - 1], empty[best]
+            i = empty[left - 1]
+            mask, masks[i] = masks[i], 0
+            digits = _bits(mask)
+            if best_count > 1:
+                found["guesses"] += 1
+                if rng is not None:
+                    rng.shuffle(digits)
+            for d in digits:
+                mark = len(trail)
+                done = _place(i, d) and _fill(left - 1)
+                _unplace(i, mark)
+                if done:
+                    break
+            masks[i] = mask
+            return done
+
+        _fill(len(empty))
+        return found["count"], found["first"], found["guesses"]
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
+    from time import time
+
+    # the same engine on each variant: an empty board to fill for the
+    # X-sudoku and the jigsaw, and a board cut into cages of two positions
+    # (totals taken from a filled board) for the killer sudoku
+    filled = UnitIndex.classic(9).search([0] * 81)[1]
+    cages = [([i, i + 1], filled[i] + filled[i + 1])
+             for i in range(0, 81, 2) if i % 9 < 8]
+    regions = [(r // 3) * 3 + (c + r) % 9 // 3
+               for r in range(9) for c in range(9)]
+    for name, index in [("X-sudoku", UnitIndex.diagonal(9)),
+                        ("jigsaw", UnitIndex.jigsaw(9, regions)),
+                        ("killer", UnitIndex.killer(9, cages))]:
+        start = time()
+        count, first, guesses = index.search([0] * 81, limit=2)
+        print("{}: {} solutions found, {} guesses, {:.2f} seconds".format(
+            name, count, guesses, time() - start))
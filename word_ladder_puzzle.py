@@ -1,23 +1,78 @@
 from puzzle import Puzzle
+import word_list
+
+# ways a ladder may step: change one character, or also insert or delete one
+MODES = ("substitute", "edit")
+
+
+def _edit_distance(a, b):
+    """
+    Return the least number of single-character substitutions, insertions
+    and deletions that turn word a into word b.
+
+    @type a: str
+    @type b: str
+    @rtype: int
+
+    >>> _edit_distance("cat", "cart"), _edit_distance("same", "cost")
+    (1, 4)
+    """
+    previous = list(range(len(b) + 1))
+    for i in range(len(a)):
+        current = [i + 1]
+        for j in range(len(b)):
+            current.append(min(previous[j + 1] + 1, current[j] + 1,
+                               previous[j] + (a[i] != b[j])))
+        previous = current
+    return previous[-1]
+
 
 class WordLadderPuzzle(Puzzle):
     """
     A word-ladder puzzle that may be solved, unsolved, or even unsolvable.
     """
 
-    def __init__(self, from_word, to_word, ws):
+    def __init__(self, from_word, to_word, ws=None, mode="substitute"):
         """
         Create a new word-ladder puzzle with the aim of stepping
         from from_word to to_word using words in ws, changing one
-        character at each step.
+        character at each step.  If ws is None, use the words of
+        words.txt, loaded the first time they are needed.  The puzzle keeps
+        a frozen copy of ws, so words added to ws later are not seen.
+
+        In mode "edit" a step may also insert or delete one character,
+        and neighbouring words are found through word_list.neighbor_index.
 
         @type from_word: str
         @type to_word: str
-        @type ws: set[str]
+        @type ws: set[str] | None
+        @type mode: str
         @rtype: None
+
+        >>> "cost" in WordLadderPuzzle("same", "cost")._word_set
+        True
+        >>> ws = {"cat", "cot"}
+        >>> w = WordLadderPuzzle("cat", "cart", ws, mode="edit")
+        >>> ws.add("cart")
+        >>> sorted([e.key() for e in w.extensions()])
+        ['cot']
+        >>> w = WordLadderPuzzle("cat", "cart", ws, mode="edit")
+        >>> sorted([e.key() for e in w.extensions()])
+        ['cart', 'cot']
+        >>> WordLadderPuzzle("same", "cost", mode="swap")
+        Traceback (most recent call last):
+        ...
+        ValueError: unknown ladder mode swap
         """
+        if mode not in MODES:
+            raise ValueError("unknown ladder mode {}".format(mode))
+        # frozenset() hands back a frozenset unchanged, so extensions
+        # share their puzzle's set without copying it
+        ws = word_list.words() if ws is None else frozenset(ws)
         (self._from_word, self._to_word, self._word_set) = (from_word,
                                                             to_word, ws)
+        self._mode = mode
+        self._hash = hash(from_word)
         # set of characters to use for 1-character changes
         self._chars = "abcdefghijklmnopqrstuvwxyz"
 
@@ -36,11 +91,22 @@ class WordLadderPuzzle(Puzzle):
         False
         >>> w1 == w3
         True
+        >>> w1 == WordLadderPuzzle('same', 'case', w1._word_set, mode='edit')
+        False
+        >>> len({w1, w2, w3})
+        2
         """
-        return (type(self) == type(other) and
-                self._from_word == other._from_word and
-                self._to_word == other._to_word and
-                self._word_set == other._word_set)
+        # the word set is shared by a puzzle and its extensions, and is
+        # only compared item by item when it is not the same set
+        return self is other or (
+            type(self) == type(other) and self._hash == other._hash and
+            self._from_word == other._from_word and
+            self._to_word == other._to_word and
+            self._mode == other._mode and
+            (self._word_set is other._word_set or
+             self._word_set == other._word_set))
+
+    __hash__ = Puzzle.__hash__
 
     def __str__(self):
         """
@@ -89,6 +155,38 @@ class WordLadderPuzzle(Puzzle):
         """
         return self._from_word == self._to_word
 
+    def heuristic(self):
+        """
+        Return the number of positions where WordLadderPuzzle self's word
+        differs from the word it is stepping to, a lower bound on the
+        steps left.
+
+        @type self: WordLadderPuzzle
+        @rtype: int
+
+        >>> WordLadderPuzzle('same', 'case', {'same', 'case'}).heuristic()
+        2
+        >>> w = WordLadderPuzzle('at', 'cat', {'at', 'cat'}, mode='edit')
+        >>> w.heuristic()
+        1
+        """
+        if self._mode == "edit":
+            return _edit_distance(self._from_word, self._to_word)
+        return (sum([a != b for a, b in zip(self._from_word, self._to_word)])
+                + abs(len(self._from_word) - len(self._to_word)))
+
+    def key(self):
+        """
+        Return the word WordLadderPuzzle self is at.
+
+        @type self: WordLadderPuzzle
+        @rtype: str
+
+        >>> WordLadderPuzzle('same', 'case', {'same', 'case'}).key()
+        'same'
+        """
+        return self._from_word
+
     def extensions(self):
         """
         Return list of extensions of WordLadderPuzzle self.
@@ -105,7 +203,16 @@ class WordLadderPuzzle(Puzzle):
         True
         >>> all([s in l1 for s in l2])
         True
+        >>> w = WordLadderPuzzle('cat', 'cart', {'cat', 'at', 'cart', 'cot'},
+        ...                      mode='edit')
+        >>> sorted([e.key() for e in w.extensions()])
+        ['at', 'cart', 'cot']
         """
+        if self._mode == "edit":
+            index = word_list.neighbor_index(self._word_set)
+            return [WordLadderPuzzle(word, self._to_word, self._word_set,
+                                     self._mode)
+                    for word in index.neighbors(self._from_word)]
         ext_list = []
         legal, illegal = 0, 1
 
@@ -132,15 +239,54 @@ class WordLadderPuzzle(Puzzle):
 
         return ext_list
 
+    def move_to(self, other):
+        """
+        Return the word WordLadderPuzzle self steps to to become its
+        extension other.
+
+        @type self: WordLadderPuzzle
+        @type other: WordLadderPuzzle
+        @rtype: str
+
+        >>> w = WordLadderPuzzle('same', 'case', {'same', 'came', 'case'})
+        >>> [w.move_to(e) for e in w.extensions()]
+        ['came']
+        """
+        return other._from_word
+
+    def apply_move(self, move):
+        """
+        Return the extension of WordLadderPuzzle self that steps to word
+        move.
+
+        @type self: WordLadderPuzzle
+        @type move: str
+        @rtype: WordLadderPuzzle
+
+        >>> w = WordLadderPuzzle('same', 'case', {'same', 'came', 'case'})
+        >>> w.apply_move('came')
+        WordLadderPuzzle(came -> case)
+        >>> w = WordLadderPuzzle('cat', 'cart', {'cat', 'cart'}, mode='edit')
+        >>> w.apply_move('cart')
+        WordLadderPuzzle(cart -> cart)
+        """
+        if self._mode == "edit":
+            legal = _edit_distance(move, self._from_word) == 1
+        else:
+            legal = (len(move) == len(self._from_word) and
+                     sum([a != b for a, b in zip(move, self._from_word)]) == 1)
+        if move not in self._word_set or not legal:
+            raise ValueError("illegal move {}".format(move))
+        return WordLadderPuzzle(move, self._to_word, self._word_set,
+                                self._mode)
+
 if __name__ == '__main__':
     import doctest
     doctest.testmod()
     from puzzle_tools import depth_first_solve, \
         breadth_first_solve
     from time import time
-    with open("words.txt", "r") as words:
-        word_set = set(words.read().split())
-    w = WordLadderPuzzle("same", "cost", word_set)
+    w = WordLadderPuzzle("same", "cost")
     start = time()
     sol = breadth_first_solve(w)
     end = time()
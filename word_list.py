@@ -0,0 +1,171 @@
+"""
+The dictionary used by word ladders, loaded on first use.
+
+Only all-lowercase entries are kept, since WordLadderPuzzle steps between
+lowercase words; entries such as "A's" or "Aaron" can never be reached.
+The filtered words are cached in __pycache__ beside the word file, and the
+cache is rebuilt whenever the word file's size or modification time change.
+"""
+from functools import lru_cache
+import marshal
+import os
+
+# default dictionary, next to this module
+WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "words.txt")
+
+# word sets already loaded in this process, by path
+_loaded = {}
+
+
+def normalize(lines):
+    """
+    Return the set of words among lines that a word ladder can use.
+
+    @type lines: list[str]
+    @rtype: frozenset[str]
+
+    >>> sorted(normalize(["A", "A's", "Aaron", "able", " ace ", "ace"]))
+    ['able', 'ace']
+    """
+    return frozenset([w for w in [line.strip() for line in lines]
+                      if w.isascii() and w.isalpha() and w.islower()])
+
+
+def _cache_path(path):
+    """
+    Return where the filtered words of the word file at path are cached.
+
+    @type path: str
+    @rtype: str
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, "__pycache__", name + ".marshal")
+
+
+def words(path=WORDS_PATH):
+    """
+    Return the set of usable words in the word file at path, reading the
+    file only the first time it is asked for in this process and only if
+    its cache is out of date.
+
+    @type path: str
+    @rtype: frozenset[str]
+
+    >>> ws = words()
+    >>> "same" in ws and "cost" in ws and "A's" not in ws
+    True
+    >>> words() is ws
+    True
+    """
+    if path in _loaded:
+        return _loaded[path]
+    status = os.stat(path)
+    stamp = (status.st_mtime_ns, status.st_size)
+    cache = _cache_path(path)
+    try:
+        with open(cache, "rb") as f:
+            cached_stamp, cached_words = marshal.load(f)
+        if tuple(cached_stamp) != stamp:
+            raise ValueError("stale word cache")
+        ws = frozenset(cached_words)
+    except (OSError, EOFError, ValueError, TypeError):
+        with open(path, "r") as f:
+            ws = normalize(f.read().split())
+        try:
+            os.makedirs(os.path.dirname(cache), exist_ok=True)
+            with open(cache, "wb") as f:
+                marshal.dump((stamp, tuple(sorted(ws))), f)
+        except OSError:
+            # a read-only tree just goes without the cache
+            pass
+    _loaded[path] = ws
+    return ws
+
+
+class NeighborIndex:
+    """
+    An index of a word set for finding the words one edit (substitution,
+    insertion or deletion of a letter) away from a given word, in time
+    proportional to the number found rather than to the size of the set.
+
+    Each word is filed under each of the strings made by deleting one of
+    its letters: by (string, position) to find substitutions, and by string
+    alone to find insertions.
+    """
+
+    def __init__(self, ws):
+        """
+        Create a new NeighborIndex self over word set ws.
+
+        @type self: NeighborIndex
+        @type ws: set[str]
+        @rtype: None
+        """
+        self._word_set = ws
+        self._by_deletion, self._longer = {}, {}
+        for word in ws:
+            for i in range(len(word)):
+                shorter = word[:i] + word[i + 1:]
+                self._by_deletion.setdefault((shorter, i), []).append(word)
+                longer = self._longer.setdefault(shorter, [])
+                if not longer or longer[-1] != word:
+                    longer.append(word)
+
+    def substitutions(self, word):
+        """
+        Return the words of NeighborIndex self that differ from word in
+        exactly one letter.
+
+        @type self: NeighborIndex
+        @type word: str
+        @rtype: list[str]
+
+        >>> index = NeighborIndex({"cat", "cot", "cut", "at", "cart"})
+        >>> sorted(index.substitutions("cat"))
+        ['cot', 'cut']
+        """
+        found = []
+        for i in range(len(word)):
+            for other in self._by_deletion.get((word[:i] + word[i + 1:], i),
+                                               []):
+                if other != word:
+                    found.append(other)
+        return found
+
+    def neighbors(self, word):
+        """
+        Return the words of NeighborIndex self one substitution, insertion
+        or deletion away from word.
+
+        @type self: NeighborIndex
+        @type word: str
+        @rtype: list[str]
+
+        >>> index = NeighborIndex({"cat", "cot", "at", "cart", "scat", "ca"})
+        >>> sorted(index.neighbors("cat"))
+        ['at', 'ca', 'cart', 'cot', 'scat']
+        """
+        found = self.substitutions(word)
+        found.extend(self._longer.get(word, []))
+        shorter = set([word[:i] + word[i + 1:] for i in range(len(word))])
+        found.extend([s for s in shorter if s in self._word_set])
+        return found
+
+
+# each index of words.txt holds about a million entries, so only the most
+# recently used few are kept
+@lru_cache(maxsize=4)
+def neighbor_index(ws):
+    """
+    Return the NeighborIndex of word set ws, building it the first time it
+    is asked for.
+
+    @type ws: frozenset[str]
+    @rtype: NeighborIndex
+
+    >>> ws = frozenset(["cat", "cot"])
+    >>> neighbor_index(ws) is neighbor_index(frozenset(["cot", "cat"]))
+    True
+    """
+    return NeighborIndex(ws)